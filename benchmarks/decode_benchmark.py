@@ -0,0 +1,133 @@
+"""Compare the JSON decode paths of irDataClient on a large linked document.
+
+Builds a synthetic results/get-like payload and measures parse time and peak
+Python memory (tracemalloc) for:
+
+- the stdlib decoder,
+- orjson (when installed),
+- the ijson streaming extraction of a single driver row (when installed).
+
+Run from the repository root:
+
+    python benchmarks/decode_benchmark.py --rows 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "iracing")
+)
+
+from iracingapi import decode  # noqa: E402
+
+PATHS = {"session_results.item.results.item": {"cust_id": 7}}
+
+
+def build_document(rows: int) -> bytes:
+    """Return a results/get-like document with ``rows`` driver rows."""
+    per_session = max(rows // 3, 1)
+    return json.dumps(
+        {
+            "subsession_id": 1,
+            "event_strength_of_field": 2100,
+            "session_results": [
+                {
+                    "simsession_number": number,
+                    "results": [
+                        {
+                            "cust_id": i,
+                            "display_name": f"Driver {i}",
+                            "finish_position": i,
+                            "incidents": i % 7,
+                            "oldi_rating": 1500 + i,
+                            "newi_rating": 1510 + i,
+                            "laps_complete": 30,
+                            "best_lap_time": 1234567,
+                            "livery": {"car_id": 67, "pattern": 3, "color1": "ffffff"},
+                        }
+                        for i in range(per_session)
+                    ],
+                }
+                for number in (0, -1, -2)
+            ],
+        }
+    ).encode()
+
+
+class _Reader:
+    """Minimal async reader standing in for aiohttp's StreamReader."""
+
+    def __init__(self, data: bytes, chunk: int = 64 * 1024) -> None:
+        self._data = data
+        self._pos = 0
+        self._chunk = chunk
+
+    async def read(self, size: int = -1) -> bytes:
+        # like aiohttp, -1 reads to the end
+        size = len(self._data) if size < 0 else min(size, self._chunk)
+        data = self._data[self._pos : self._pos + size]
+        self._pos += len(data)
+        return data
+
+
+def measure(name: str, func) -> dict:
+    """Return the parse time of ``func`` and its peak traced memory.
+
+    Time and memory come from separate runs, tracemalloc slows parsing down.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"decoder": name, "seconds": elapsed, "peak_bytes": peak}
+
+
+def main() -> None:
+    """Run the benchmark and print one line per decoder."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="print JSON output")
+    args = parser.parse_args()
+
+    document = build_document(args.rows)
+    runs = [
+        measure("json", lambda: decode.select(json.loads(document), PATHS)),
+    ]
+    if decode.orjson is not None:
+        runs.append(
+            measure(
+                "orjson", lambda: decode.select(decode.orjson.loads(document), PATHS)
+            )
+        )
+    if decode.ijson is not None:
+        runs.append(
+            measure(
+                "ijson stream",
+                lambda: asyncio.run(decode.stream_select(_Reader(document), PATHS)),
+            )
+        )
+
+    if args.json:
+        print(json.dumps({"document_bytes": len(document), "runs": runs}, indent=2))
+        return
+    print(f"document: {len(document) / 1e6:.1f} MB, {args.rows} rows")
+    for run in runs:
+        print(
+            f"{run['decoder']:<14} {run['seconds'] * 1000:9.1f} ms"
+            f" {run['peak_bytes'] / 1e6:9.1f} MB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
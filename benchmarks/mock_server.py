@@ -0,0 +1,409 @@
+"""Local stand-in for the iRacing Data API.
+
+Serves ``/auth``, ``/data/member/get``, ``/data/stats/member_career``,
+``/data/stats/member_recent_races``, ``/data/series/seasons``,
+``/data/results/get``, ``/data/results/lap_data``, ``/data/car/get``,
+``/data/track/get``, ``/data/series/get`` and the signed S3-like documents
+they link to, lap data chunks included, with configurable latency, 401/429
+injection and ``x-ratelimit-*`` headers.
+
+``GET /_stats`` returns the request counters, ``POST /_reset`` clears them.
+
+    python benchmarks/mock_server.py --port 8765 --latency 50 --fail-429 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from aiohttp import web
+
+CATEGORIES = (1, 3, 4, 5, 6)
+AUTH_COOKIE = "authtoken_members"
+LINK_TTL = 60
+SERIES = 20
+LAP_CHUNK_SIZE = 25
+
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock server."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    fail_401: float = 0.0
+    fail_429: float = 0.0
+    ratelimit: int = 240
+    ratelimit_window: float = 60.0
+    races_per_driver: int = 10
+    cars: int = 150
+    field_size: int = 30
+    laps_per_race: int = 30
+
+
+class MockDataApi:
+    """State of the mock server: counters, rate-limit window and documents."""
+
+    def __init__(self, settings: MockSettings) -> None:
+        self.settings = settings
+        self.counts: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self.window_start = time.time()
+        self.window_used = 0
+        self.documents: dict[str, tuple[float, bytes]] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_post("/_reset", self.reset)
+        app.router.add_post("/auth", self.auth)
+        app.router.add_get("/s3/{doc_id}", self.document)
+        app.router.add_get("/data/{tail:.*}", self.data)
+        return app
+
+    async def _delay(self) -> None:
+        delay = self.settings.latency + random.uniform(0, self.settings.jitter)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+    def _ratelimit_headers(self) -> dict[str, str]:
+        now = time.time()
+        if now - self.window_start >= self.settings.ratelimit_window:
+            self.window_start = now
+            self.window_used = 0
+        self.window_used += 1
+        reset = int(self.window_start + self.settings.ratelimit_window)
+        return {
+            "x-ratelimit-limit": str(self.settings.ratelimit),
+            "x-ratelimit-remaining": str(
+                max(self.settings.ratelimit - self.window_used, 0)
+            ),
+            "x-ratelimit-reset": str(reset),
+        }
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"requests": dict(self.counts), "bytes_sent": self.bytes_sent}
+        )
+
+    async def reset(self, request: web.Request) -> web.Response:
+        self.counts.clear()
+        self.bytes_sent = 0
+        return web.json_response({})
+
+    async def auth(self, request: web.Request) -> web.Response:
+        self.counts["/auth"] += 1
+        await self._delay()
+        response = web.json_response({"authcode": uuid.uuid4().hex})
+        response.set_cookie(AUTH_COOKIE, uuid.uuid4().hex, max_age=3600)
+        return response
+
+    async def document(self, request: web.Request) -> web.Response:
+        self.counts["/s3"] += 1
+        await self._delay()
+        expires, body = self.documents.get(request.match_info["doc_id"], (0, b""))
+        if expires < time.time():
+            return web.Response(status=403)
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json")
+
+    async def data(self, request: web.Request) -> web.Response:
+        path = request.path
+        self.counts[path] += 1
+        await self._delay()
+        headers = self._ratelimit_headers()
+        if (
+            AUTH_COOKIE not in request.cookies
+            or random.random() < self.settings.fail_401
+        ):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        if (
+            int(headers["x-ratelimit-remaining"]) == 0
+            or random.random() < self.settings.fail_429
+        ):
+            # injected 429s only hold the client back for a second
+            headers["x-ratelimit-remaining"] = "0"
+            headers["x-ratelimit-reset"] = str(
+                min(int(headers["x-ratelimit-reset"]), int(time.time()) + 1)
+            )
+            return web.json_response(
+                {"error": "Rate limited"}, status=429, headers=headers
+            )
+
+        payload = self.payload(path, request.query, request.url.origin())
+        if payload is None:
+            return web.json_response({"error": "Not found"}, status=404)
+        doc_id = self._publish(payload)
+        expires = time.strftime(
+            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + LINK_TTL)
+        )
+        return web.json_response(
+            {"link": f"{request.url.origin()}/s3/{doc_id}", "expires": expires},
+            headers=headers,
+        )
+
+    def _publish(self, payload: dict | list) -> str:
+        """Store a document behind a signed link, return its id."""
+        doc_id = uuid.uuid4().hex
+        self.documents[doc_id] = (
+            time.time() + LINK_TTL,
+            web.json_response(payload).body,
+        )
+        return doc_id
+
+    def payload(self, path: str, query, origin) -> dict | list | None:
+        if path == "/data/member/get":
+            return {
+                "members": [
+                    member(int(cust_id)) for cust_id in query["cust_ids"].split(",")
+                ]
+            }
+        if path == "/data/stats/member_career":
+            return career(int(query["cust_id"]))
+        if path == "/data/stats/member_recent_races":
+            return recent_races(int(query["cust_id"]), self.settings.races_per_driver)
+        if path == "/data/series/seasons":
+            return seasons()
+        if path == "/data/results/get":
+            return result(int(query["subsession_id"]), self.settings.field_size)
+        if path == "/data/results/lap_data":
+            laps = lap_data(int(query["cust_id"]), self.settings.laps_per_race)
+            chunks = [
+                laps[i : i + LAP_CHUNK_SIZE]
+                for i in range(0, len(laps), LAP_CHUNK_SIZE)
+            ]
+            return {
+                "success": True,
+                "chunk_info": {
+                    "num_chunks": len(chunks),
+                    "rows": len(laps),
+                    "base_download_url": f"{origin}/s3/",
+                    "chunk_file_names": [self._publish(chunk) for chunk in chunks],
+                },
+            }
+        if path == "/data/car/get":
+            return [
+                {"car_id": car_id, "car_name": f"Car {car_id}"}
+                for car_id in range(1, self.settings.cars + 1)
+            ]
+        if path == "/data/track/get":
+            return [
+                {"track_id": track_id, "track_name": f"Track {track_id}"}
+                for track_id in range(1, 400)
+            ]
+        if path == "/data/series/get":
+            return [
+                {"series_id": series_id, "series_name": f"Series {series_id}"}
+                for series_id in range(1, 200)
+            ]
+        return None
+
+
+def member(cust_id: int) -> dict:
+    """Return a member/get entry."""
+    return {
+        "cust_id": cust_id,
+        "display_name": f"Driver {cust_id}",
+        "licenses": [
+            {
+                "category_id": category_id,
+                "irating": 1000 + (cust_id * 37 + category_id) % 4000,
+                "safety_rating": round(1 + (cust_id % 300) / 100, 2),
+            }
+            for category_id in CATEGORIES
+        ],
+    }
+
+
+def career(cust_id: int) -> dict:
+    """Return a member_career payload."""
+    return {
+        "cust_id": cust_id,
+        "stats": [
+            {
+                "category_id": category_id,
+                "starts": cust_id % 500,
+                "laps": cust_id % 500 * 20,
+                "wins": cust_id % 17,
+                "top5": cust_id % 43,
+            }
+            for category_id in CATEGORIES
+        ],
+    }
+
+
+def recent_races(cust_id: int, count: int) -> dict:
+    """Return a member_recent_races payload."""
+    now = int(time.time())
+    return {
+        "cust_id": cust_id,
+        "races": [
+            {
+                "subsession_id": cust_id * 1000 + i,
+                "session_start_time": time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - 86400 * (i + 1))
+                ),
+                "series_id": 1 + i % SERIES,
+                "series_name": f"Series {1 + i % SERIES}",
+                "car_id": 1 + (cust_id + i) % 150,
+                "license_level": 12,
+                "start_position": 1 + i % 20,
+                "finish_position": 1 + (i * 3) % 20,
+                "laps": 20,
+                "laps_led": 0,
+                "incidents": i % 9,
+                "points": 50,
+                "strength_of_field": 1800,
+                "oldi_rating": 1500,
+                "newi_rating": 1512,
+                "old_sub_level": 250,
+                "new_sub_level": 262,
+                "winner_name": "Someone",
+                "track": {"track_id": 1 + i % 50, "track_name": f"Track {1 + i % 50}"},
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def seasons() -> list:
+    """Return a series/seasons payload, 12 weeks from three weeks ago."""
+    today = date.today()
+    first_week = today - timedelta(days=today.weekday() + 21)
+    return [
+        {
+            "season_id": 5000 + series_id,
+            "series_id": series_id,
+            "season_name": f"Series {series_id} Season",
+            "schedules": [
+                {
+                    "season_id": 5000 + series_id,
+                    "series_id": series_id,
+                    "series_name": f"Series {series_id}",
+                    "season_name": f"Series {series_id} Season",
+                    "race_week_num": week,
+                    "start_date": (first_week + timedelta(weeks=week)).isoformat(),
+                    "track": {
+                        "track_id": 1 + (series_id + week) % 50,
+                        "track_name": f"Track {1 + (series_id + week) % 50}",
+                        "config_name": "Full",
+                    },
+                    "race_time_descriptors": [
+                        {
+                            "repeating": True,
+                            "first_session_time": f"00:{series_id % 4 * 15:02d}:00",
+                            "repeat_minutes": 120,
+                            "day_offset": list(range(7)),
+                            "start_date": (
+                                first_week + timedelta(weeks=week)
+                            ).isoformat(),
+                            "session_minutes": 40,
+                        }
+                    ],
+                }
+                for week in range(12)
+            ],
+        }
+        for series_id in range(1, SERIES + 1)
+    ]
+
+
+def result(subsession_id: int, field_size: int) -> dict:
+    """Return a results/get payload, the driver of the race and its field."""
+    driver = subsession_id // 1000
+    rows = [
+        {
+            "cust_id": cust_id,
+            "display_name": f"Driver {cust_id}",
+            "car_class_id": 1,
+            "starting_position": position,
+            "finish_position": (position + 3) % field_size,
+            "finish_position_in_class": (position + 3) % field_size,
+            "laps_complete": 20,
+            "incidents": cust_id % 9,
+            "oldi_rating": 1500,
+            "newi_rating": 1500 + (field_size // 2 - position),
+            "reason_out": "Running",
+        }
+        for position, cust_id in enumerate(range(driver, driver + field_size))
+    ]
+    return {
+        "subsession_id": subsession_id,
+        "event_strength_of_field": 1800,
+        "session_splits": [{"subsession_id": subsession_id}],
+        "car_classes": [
+            {
+                "car_class_id": 1,
+                "short_name": "Class 1",
+                "strength_of_field": 1800,
+                "num_entries": field_size,
+            }
+        ],
+        "session_results": [
+            {"simsession_number": -1, "simsession_name": "QUALIFY", "results": rows},
+            {"simsession_number": 0, "simsession_name": "RACE", "results": rows},
+        ],
+    }
+
+
+def lap_data(cust_id: int, laps: int) -> list:
+    """Return the lap rows of a driver, some with an incident or a pit stop."""
+    return [
+        {
+            "cust_id": cust_id,
+            "lap_number": lap,
+            # the first lap has no time
+            "lap_time": 900000 + (cust_id * 7 + lap * 13) % 20000 if lap else -1,
+            "incident": lap % 11 == 5,
+            "lap_events": ["pitted"] if lap == laps // 2 else [],
+        }
+        for lap in range(laps)
+    ]
+
+
+async def start_server(
+    settings: MockSettings, host: str = "localhost", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Start the mock server on the running loop, return it and its base URL."""
+    runner = web.AppRunner(MockDataApi(settings).app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+
+def main() -> None:
+    """Run the mock server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random ms")
+    parser.add_argument("--fail-401", type=float, default=0, help="probability")
+    parser.add_argument("--fail-429", type=float, default=0, help="probability")
+    parser.add_argument("--ratelimit", type=int, default=240)
+    parser.add_argument("--ratelimit-window", type=float, default=60)
+    args = parser.parse_args()
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_401=args.fail_401,
+        fail_429=args.fail_429,
+        ratelimit=args.ratelimit,
+        ratelimit_window=args.ratelimit_window,
+    )
+    web.run_app(
+        MockDataApi(settings).app(), host=args.host, port=args.port, access_log=None
+    )
+
+
+if __name__ == "__main__":
+    main()
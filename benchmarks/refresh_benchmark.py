@@ -0,0 +1,503 @@
+"""Measure what a refresh costs against the local mock Data API.
+
+Starts ``mock_server.py`` in a separate process and, for 1, 10, 100 and 1000
+drivers, refreshes them all through:
+
+- ``client``: ``irDataClient`` alone, the calls a coordinator makes,
+- ``coordinator``: one ``IracingDataUpdateCoordinator`` per driver sharing
+  the client and the member batcher, on a bare Home Assistant instance.
+
+Each scenario is refreshed twice (cold, then warm caches) and reports the
+refresh latency, the requests the server saw, the event loop lag, the work
+sent to the executor and, in a separate tracemalloc run, the memory.
+
+Results are written to ``benchmarks/results/<git revision>.json``; compare
+two runs with:
+
+    python benchmarks/refresh_benchmark.py --latency 20
+    python benchmarks/refresh_benchmark.py --compare results/a.json results/b.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "iracing"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iracingapi import irDataClient  # noqa: E402
+from mock_server import MockDataApi, MockSettings  # noqa: E402
+
+DRIVER_COUNTS = (1, 10, 100, 1000)
+FIRST_CUST_ID = 100000
+# the event loop is considered blocked when a tick comes this late
+LAG_INTERVAL = 0.005
+MEMBER_BATCH_SIZE = 50
+
+_LOGGER = logging.getLogger("refresh_benchmark")
+
+
+def serve(settings: MockSettings, port: int) -> None:
+    """Run the mock server, in the child process."""
+    from aiohttp import web
+
+    web.run_app(
+        MockDataApi(settings).app(),
+        host="localhost",
+        port=port,
+        access_log=None,
+        print=None,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+class MockServer:
+    """Mock Data API running in its own process, so it does not load our loop."""
+
+    def __init__(self, settings: MockSettings) -> None:
+        self.port = free_port()
+        self.base_url = f"http://localhost:{self.port}"
+        self.process = multiprocessing.Process(
+            target=serve, args=(settings, self.port), daemon=True
+        )
+
+    async def start(self) -> None:
+        self.process.start()
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(self.base_url + "/_stats"):
+                        return
+                except aiohttp.ClientError:
+                    await asyncio.sleep(0.05)
+        raise RuntimeError("Mock server did not start")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.join()
+
+    async def reset(self) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(self.base_url + "/_reset"):
+                pass
+
+    async def stats(self) -> dict:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(self.base_url + "/_stats") as response:
+                return await response.json()
+
+
+class LoopMonitor:
+    """Sample how late the event loop runs a periodic tick."""
+
+    def __init__(self) -> None:
+        self.max_lag = 0.0
+        self.blocked = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = loop.time() - start - LAG_INTERVAL
+            self.max_lag = max(self.max_lag, lag)
+            if lag > LAG_INTERVAL:
+                self.blocked += lag
+
+    def __enter__(self) -> LoopMonitor:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Default executor recording how many jobs it ran and for how long."""
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=8)
+        self.jobs = 0
+        self.busy = 0.0
+
+    def submit(self, fn, /, *args, **kwargs):
+        self.jobs += 1
+
+        def timed():
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.busy += time.perf_counter() - start
+
+        return super().submit(timed)
+
+
+def cust_ids(drivers: int) -> list[str]:
+    return [str(FIRST_CUST_ID + i) for i in range(drivers)]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "total_ms": round(max(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+    }
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+class ClientScenario:
+    """Refresh the drivers with irDataClient alone."""
+
+    name = "client"
+
+    def __init__(self, base_url: str, drivers: int) -> None:
+        self.base_url = base_url
+        self.cust_ids = cust_ids(drivers)
+        self.errors = 0
+
+    async def setup(self) -> None:
+        self.session = aiohttp.ClientSession()
+        self.api = irDataClient("bench", "bench", _LOGGER, session=self.session)
+        self.api.base_url = self.base_url
+
+    async def _refresh_driver(self, cust_id: str) -> None:
+        try:
+            await asyncio.gather(
+                self.api.get_member_career(cust_id),
+                self.api.get_recent_results(cust_id),
+            )
+        except Exception:  # noqa: BLE001
+            self.errors += 1
+
+    async def refresh(self) -> list[float]:
+        members = [
+            self.api.get_members(self.cust_ids[i : i + MEMBER_BATCH_SIZE])
+            for i in range(0, len(self.cust_ids), MEMBER_BATCH_SIZE)
+        ]
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            asyncio.gather(*members, return_exceptions=True),
+            *(timed(self._refresh_driver(cust_id)) for cust_id in self.cust_ids),
+        )
+        # every driver also waits for the member batch holding it
+        batch = time.perf_counter() - start
+        self.errors += sum(isinstance(r, Exception) for r in results[0])
+        return [max(latency, batch) for latency in results[1:]]
+
+    async def teardown(self) -> None:
+        await self.session.close()
+
+    def retained(self) -> int:
+        return 0
+
+
+class CoordinatorScenario:
+    """Refresh one coordinator per driver on a bare Home Assistant."""
+
+    name = "coordinator"
+    username = password = "bench"
+
+    def __init__(self, base_url: str, drivers: int) -> None:
+        self.base_url = base_url
+        self.cust_ids = cust_ids(drivers)
+        self.errors = 0
+
+    async def setup(self) -> None:
+        from homeassistant.core import HomeAssistant
+
+        from custom_components.iracing import get_iracing_client
+        from custom_components.iracing.coordinator import (
+            IracingDataUpdateCoordinator,
+            IracingMemberBatcher,
+        )
+        from custom_components.iracing.results import SubsessionResults
+        from custom_components.iracing.scheduler import RefreshScheduler
+
+        self.config_dir = tempfile.mkdtemp(prefix="iracing-bench-")
+        self.hass = HomeAssistant(self.config_dir)
+        self.hass.config.set_time_zone("UTC")
+        await self.hass.async_start()
+        self.api = get_iracing_client(self.hass, self.username, self.password, None)
+        self.api.base_url = self.base_url
+        # shared by the entries, as set up by the integration
+        members = IracingMemberBatcher(self.hass, self.api)
+        scheduler = RefreshScheduler()
+        results = SubsessionResults(self.hass, self.api)
+        self.coordinators = [
+            IracingDataUpdateCoordinator(
+                self.hass,
+                config_entry(cust_id),
+                self.api,
+                members,
+                scheduler,
+                results,
+            )
+            for cust_id in self.cust_ids
+        ]
+
+    async def refresh(self) -> list[float]:
+        latencies = await asyncio.gather(
+            *(timed(coordinator.async_refresh()) for coordinator in self.coordinators)
+        )
+        self.errors += sum(
+            coordinator.data is None or coordinator.data.name is None
+            for coordinator in self.coordinators
+        )
+        return latencies
+
+    async def teardown(self) -> None:
+        for coordinator in self.coordinators:
+            await coordinator.async_shutdown()
+        await self.hass.async_stop(force=True)
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def retained(self) -> int:
+        return sum(
+            coordinator.data.memory_usage()
+            for coordinator in self.coordinators
+            if coordinator.data is not None
+        )
+
+
+def config_entry(cust_id: str):
+    """Return a config entry for a driver, whatever the Home Assistant version."""
+    import inspect
+    from types import MappingProxyType
+
+    from homeassistant.config_entries import ConfigEntry
+
+    kwargs = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": "iracing",
+        "title": cust_id,
+        "data": {"cust_id": cust_id},
+        "source": "user",
+        "options": {},
+        "unique_id": cust_id,
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": None,
+    }
+    parameters = inspect.signature(ConfigEntry).parameters
+    return ConfigEntry(**{k: v for k, v in kwargs.items() if k in parameters})
+
+
+async def run_scenario(scenario_cls, server: MockServer, drivers: int) -> dict:
+    loop = asyncio.get_running_loop()
+    executor = CountingExecutor()
+    loop.set_default_executor(executor)
+
+    result = {"scenario": scenario_cls.name, "drivers": drivers}
+    scenario = scenario_cls(server.base_url, drivers)
+    await scenario.setup()
+    try:
+        for phase in ("cold", "warm"):
+            await server.reset()
+            jobs, busy = executor.jobs, executor.busy
+            with LoopMonitor() as monitor:
+                latencies = await scenario.refresh()
+            stats = await server.stats()
+            result[phase] = {
+                **latency_summary(latencies),
+                "requests": sum(stats["requests"].values()),
+                "requests_by_path": stats["requests"],
+                "bytes_received": stats["bytes_sent"],
+                "loop_max_lag_ms": round(monitor.max_lag * 1000, 2),
+                "loop_blocked_ms": round(monitor.blocked * 1000, 2),
+                "executor_jobs": executor.jobs - jobs,
+                "executor_busy_ms": round((executor.busy - busy) * 1000, 2),
+            }
+        result["errors"] = scenario.errors
+        result["snapshot_bytes"] = scenario.retained()
+    finally:
+        await scenario.teardown()
+    return result
+
+
+async def measure_memory(scenario_cls, server: MockServer, drivers: int) -> dict:
+    """Run a cold refresh under tracemalloc, apart from the timed runs."""
+    scenario = scenario_cls(server.base_url, drivers)
+    await scenario.setup()
+    try:
+        tracemalloc.start()
+        await scenario.refresh()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await scenario.teardown()
+    return {"retained_kb": current // 1024, "peak_kb": peak // 1024}
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return revision + ("-dirty" if dirty else "")
+
+
+def scenarios(names: list[str]) -> list:
+    available = [ClientScenario]
+    try:
+        import homeassistant  # noqa: F401
+    except ImportError:
+        print("homeassistant is not installed, skipping the coordinator scenario")
+    else:
+        available.append(CoordinatorScenario)
+    return [cls for cls in available if cls.name in names]
+
+
+async def run(args) -> dict:
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_401=args.fail_401,
+        fail_429=args.fail_429,
+        ratelimit=args.ratelimit,
+    )
+    server = MockServer(settings)
+    await server.start()
+    results = []
+    try:
+        for scenario_cls in scenarios(args.scenarios):
+            for drivers in args.drivers:
+                result = await run_scenario(scenario_cls, server, drivers)
+                if not args.no_memory:
+                    result["memory"] = await measure_memory(
+                        scenario_cls, server, drivers
+                    )
+                print_result(result)
+                results.append(result)
+    finally:
+        server.stop()
+    return {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": vars(settings),
+        "results": results,
+    }
+
+
+def print_result(result: dict) -> None:
+    cold, warm = result["cold"], result["warm"]
+    print(
+        f"{result['scenario']:<12}{result['drivers']:>5} drivers  "
+        f"cold {cold['total_ms']:>9.1f} ms {cold['requests']:>5} req  "
+        f"warm {warm['total_ms']:>9.1f} ms {warm['requests']:>5} req  "
+        f"lag {cold['loop_max_lag_ms']:>6.1f} ms  "
+        f"executor {cold['executor_jobs']:>4} jobs  "
+        f"errors {result['errors']}"
+        + (f"  peak {result['memory']['peak_kb']} KiB" if "memory" in result else "")
+    )
+
+
+COMPARED = (
+    ("cold", "total_ms"),
+    ("cold", "requests"),
+    ("cold", "loop_blocked_ms"),
+    ("warm", "total_ms"),
+    ("warm", "requests"),
+    ("memory", "peak_kb"),
+)
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print the relative change of the main figures between two runs."""
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+    print(f"{before['revision']} -> {after['revision']}")
+    previous = {(r["scenario"], r["drivers"]): r for r in before["results"]}
+    for result in after["results"]:
+        old = previous.get((result["scenario"], result["drivers"]))
+        if old is None:
+            continue
+        print(f"{result['scenario']} {result['drivers']} drivers")
+        for phase, metric in COMPARED:
+            if phase not in old or phase not in result:
+                continue
+            a, b = old[phase][metric], result[phase][metric]
+            change = f"{(b - a) / a * 100:+.1f}%" if a else ""
+            print(f"  {phase:<7}{metric:<18}{a:>12} {b:>12} {change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drivers", type=int, nargs="+", default=list(DRIVER_COUNTS))
+    parser.add_argument("--scenarios", nargs="+", default=["client", "coordinator"])
+    parser.add_argument("--latency", type=float, default=0, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random ms")
+    parser.add_argument("--fail-401", type=float, default=0, help="probability")
+    parser.add_argument("--fail-429", type=float, default=0, help="probability")
+    parser.add_argument(
+        "--ratelimit", type=int, default=100000, help="requests per minute"
+    )
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", help="defaults to results/<revision>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "results",
+        f"{report['revision']}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Record the Data API traffic of refreshes, then replay it offline.
+
+Recording runs the ``coordinator`` scenario of ``refresh_benchmark.py``
+against the mock server, or against iRacing with ``--live``, and writes
+every exchange, linked documents and rate-limit headers included, to a
+gzip-compressed archive. Replaying runs the same coordinators on a session
+answering from the archive, with the recorded latencies divided by
+``--speed`` (0 answers at once), without any network:
+
+    python benchmarks/replay.py record traffic.jsonl.gz --drivers 10 --latency 20
+    python benchmarks/replay.py record traffic.jsonl.gz --live \\
+        --username EMAIL --password PASSWORD --cust-ids 123456 234567
+    python benchmarks/replay.py replay traffic.jsonl.gz --speed 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from refresh_benchmark import (
+    CoordinatorScenario,
+    LoopMonitor,
+    MockServer,
+    MockSettings,
+    cust_ids,
+    latency_summary,
+)
+
+from iracingapi.transport import ReplaySession, RecordingSession, read_archive
+
+LIVE_URL = "https://members-ng.iracing.com"
+
+
+class ArchiveScenario(CoordinatorScenario):
+    """The coordinator scenario on a recording or replaying session."""
+
+    def __init__(self, base_url, drivers, wrap_session, username=None, password=None):
+        super().__init__(base_url, 0)
+        self.cust_ids = drivers
+        self.wrap_session = wrap_session
+        if username:
+            self.username, self.password = username, password
+
+    async def setup(self) -> None:
+        await super().setup()
+        self.api.session = self.wrap_session(self.api.session)
+
+
+async def record(args) -> None:
+    server = None
+    if args.live:
+        base_url, drivers = LIVE_URL, args.cust_ids
+    else:
+        server = MockServer(MockSettings(latency=args.latency, jitter=args.jitter))
+        await server.start()
+        base_url, drivers = server.base_url, cust_ids(args.drivers)
+
+    recorders = []
+
+    def wrap_session(session):
+        recorders.append(RecordingSession(session))
+        return recorders[-1]
+
+    scenario = ArchiveScenario(
+        base_url, drivers, wrap_session, args.username, args.password
+    )
+    await scenario.setup()
+    try:
+        for _ in range(args.refreshes):
+            await scenario.refresh()
+    finally:
+        await scenario.teardown()
+        if server is not None:
+            server.stop()
+    recorder = recorders[0]
+    recorder.save(
+        args.archive, base_url=base_url, cust_ids=drivers, refreshes=args.refreshes
+    )
+    print(f"Recorded {len(recorder.exchanges)} exchanges to {args.archive}")
+
+
+async def replay(args) -> None:
+    metadata, exchanges = read_archive(args.archive)
+    session = ReplaySession(exchanges, args.speed)
+    scenario = ArchiveScenario(
+        metadata["base_url"], metadata["cust_ids"], lambda _: session
+    )
+    await scenario.setup()
+    try:
+        for refresh in range(args.refreshes or metadata["refreshes"]):
+            with LoopMonitor() as monitor:
+                latencies = await scenario.refresh()
+            summary = latency_summary(latencies)
+            print(
+                f"refresh {refresh + 1}: total {summary['total_ms']} ms  "
+                f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+                f"lag {monitor.max_lag * 1000:.1f} ms"
+            )
+    finally:
+        await scenario.teardown()
+    print(f"errors {scenario.errors}, requests not in the archive {session.missed}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recording = commands.add_parser("record")
+    recording.add_argument("archive")
+    recording.add_argument("--drivers", type=int, default=10)
+    recording.add_argument("--refreshes", type=int, default=2)
+    recording.add_argument("--latency", type=float, default=0, help="ms per request")
+    recording.add_argument("--jitter", type=float, default=0, help="extra random ms")
+    recording.add_argument("--live", action="store_true", help="record iRacing")
+    recording.add_argument("--username")
+    recording.add_argument("--password")
+    recording.add_argument("--cust-ids", nargs="+", default=[])
+
+    replaying = commands.add_parser("replay")
+    replaying.add_argument("archive")
+    replaying.add_argument("--speed", type=float, default=1.0)
+    replaying.add_argument("--refreshes", type=int, help="defaults to the recorded")
+
+    args = parser.parse_args()
+    if (
+        args.command == "record"
+        and args.live
+        and not (args.username and args.password and args.cust_ids)
+    ):
+        parser.error("--live needs --username, --password and --cust-ids")
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(record(args) if args.command == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,111 @@
 from __future__ import annotations
 
 import logging
+
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from .iracingapi import irDataClient
 
-from .const import DOMAIN, DATA_CONFIG_ENTRY
-from .coordinator import IracingDataUpdateCoordinator
+from .const import (
+    CONF_ROSTER_ID,
+    DOMAIN,
+    DATA_CONFIG_ENTRY,
+    DATA_MEMBERS,
+    DATA_RESULTS,
+    DATA_SCHEDULER,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    RACE_HISTORY_SIZE,
+    SERVICE_GET_RECENT_RESULTS,
+    STORAGE_KEY_ASSETS,
+    STORAGE_KEY_SCHEDULE,
+    STORAGE_KEY_SESSION,
+    STORAGE_VERSION,
+)
+from .coordinator import (
+    IracingDataUpdateCoordinator,
+    IracingMemberBatcher,
+    IracingRosterCoordinator,
+    snapshot_store,
+)
+from .history import history_store
+from .results import SubsessionResults, async_remove_results
+from .scheduler import RefreshScheduler
+from .statistics_import import statistics_store
 
 # TODO List the platforms that you want to support.
 # For your initial PR, limit it to 1 platform.
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 _LOGGER = logging.getLogger(__name__)
 
-
-def get_iracing_client(username, password) -> irDataClient | None:
-    client = irDataClient(username, password, _LOGGER)
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+GET_RECENT_RESULTS_SCHEMA = vol.Schema(
+    {
+        vol.Required("cust_id"): cv.string,
+        vol.Optional("count", default=5): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=RACE_HISTORY_SIZE)
+        ),
+    }
+)
+
+
+def get_iracing_client(
+    hass: HomeAssistant, username, password, max_concurrency
+) -> irDataClient | None:
+    # dedicated cookie jar for the iRacing auth cookies, pooled HA connector,
+    # detached at shutdown and when the entry holding the credentials unloads
+    session = async_create_clientsession(hass)
+    client = irDataClient(
+        username,
+        password,
+        _LOGGER,
+        session=session,
+        max_concurrency=max_concurrency,
+        asset_store=Store(hass, STORAGE_VERSION, STORAGE_KEY_ASSETS),
+        session_store=Store(hass, STORAGE_VERSION, STORAGE_KEY_SESSION, private=True),
+        schedule_store=Store(hass, STORAGE_VERSION, STORAGE_KEY_SCHEDULE),
+    )
     return client
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the iRacing services."""
+    # shared by all the entries, whatever their credentials
+    hass.data.setdefault(DOMAIN, {})[DATA_SCHEDULER] = RefreshScheduler()
+
+    async def async_get_recent_results(call: ServiceCall) -> ServiceResponse:
+        """Return the recent results of a monitored driver."""
+        for coordinator in (
+            hass.data.get(DOMAIN, {}).get(DATA_CONFIG_ENTRY, {}).values()
+        ):
+            if isinstance(coordinator, IracingDataUpdateCoordinator) and str(
+                coordinator.config_entry.data["cust_id"]
+            ) == str(call.data["cust_id"]):
+                return {"races": coordinator.history.last(call.data["count"])}
+        raise HomeAssistantError(f"Driver {call.data['cust_id']} is not monitored")
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_RECENT_RESULTS,
+        async_get_recent_results,
+        schema=GET_RECENT_RESULTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up iRacing from a config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -33,25 +119,82 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN][DATA_CONFIG_ENTRY]["credentials_available"] = True
 
         hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"] = get_iracing_client(
-            entry.data["username"], entry.data["password"]
+            hass,
+            entry.data["username"],
+            entry.data["password"],
+            entry.options.get(
+                "max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS
+            ),
+        )
+        hass.data[DOMAIN][DATA_CONFIG_ENTRY][DATA_MEMBERS] = IracingMemberBatcher(
+            hass, hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"]
+        )
+        hass.data[DOMAIN][DATA_CONFIG_ENTRY][DATA_RESULTS] = SubsessionResults(
+            hass, hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"]
         )
 
-    coordinator = IracingDataUpdateCoordinator(
-        hass,
-        entry,
-        hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"],
-    )
+    if CONF_ROSTER_ID in entry.data:
+        coordinator = IracingRosterCoordinator(
+            hass,
+            entry,
+            hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"],
+            hass.data[DOMAIN].get(DATA_SCHEDULER),
+        )
+    else:
+        coordinator = IracingDataUpdateCoordinator(
+            hass,
+            entry,
+            hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"],
+            hass.data[DOMAIN][DATA_CONFIG_ENTRY][DATA_MEMBERS],
+            hass.data[DOMAIN].get(DATA_SCHEDULER),
+            hass.data[DOMAIN][DATA_CONFIG_ENTRY][DATA_RESULTS],
+        )
 
     hass.data[DOMAIN][DATA_CONFIG_ENTRY][entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_options_updated))
 
     return True
 
 
+async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload an entry with its new options.
+
+    The entry holding the credentials owns the shared client, the other
+    entries are reloaded after it to use the new one.
+    """
+    await hass.config_entries.async_reload(entry.entry_id)
+    if "username" in entry.data:
+        for other in hass.config_entries.async_entries(DOMAIN):
+            if other.entry_id != entry.entry_id:
+                await hass.config_entries.async_reload(other.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN][DATA_CONFIG_ENTRY].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN][DATA_CONFIG_ENTRY].pop(entry.entry_id)
+        if isinstance(coordinator, IracingDataUpdateCoordinator):
+            coordinator.members.unregister(entry.data["cust_id"])
+        if "username" in entry.data:
+            # a reload sets up a new client with a session of its own
+            hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"].session.detach()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data stored for a config entry."""
+    if "username" in entry.data and not any(
+        "username" in other.data
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        # the results are downloaded with the credentials, for all the entries
+        await async_remove_results(hass)
+    if "cust_id" not in entry.data:
+        return
+    await history_store(hass, entry.data["cust_id"]).async_remove()
+    await snapshot_store(hass, entry.data["cust_id"]).async_remove()
+    await statistics_store(hass, entry.data["cust_id"]).async_remove()
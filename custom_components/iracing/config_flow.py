@@ -6,21 +6,47 @@ import logging
 from typing import Any
 
 import voluptuous as vol
-import requests
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from .iracingapi import irDataClient, IracingConnectionError, IracingAuthError
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.selector import (
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
     TextSelector,
     TextSelectorConfig,
     TextSelectorType,
 )
 from homeassistant.core import callback
 
-from .const import DOMAIN, DATA_CONFIG_ENTRY
+from .const import (
+    CONF_FOLLOWED,
+    CONF_ROSTER_ID,
+    CONF_ROSTER_TYPE,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_REFRESH_INTERVAL,
+    DEFAULT_MIN_REFRESH_INTERVAL,
+    DEFAULT_REFRESH_INTERVAL,
+    DOMAIN,
+    DATA_CONFIG_ENTRY,
+    ROSTER_TYPES,
+    STORAGE_KEY_SESSION,
+    STORAGE_VERSION,
+)
+from .coordinator import async_fetch_roster
+from .iracingapi import PRIORITY_INTERACTIVE, request_priority
+from .iracingapi.lookup import MIN_SEARCH_LENGTH
+
+# drivers offered when a search matches several
+MAX_SEARCH_RESULTS = 25
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -41,32 +67,95 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
-STEP_USER_DATA_SCHEMA_NO_LOGIN = vol.Schema(
-    {
-        vol.Required("cust_id"): TextSelector(
-            TextSelectorConfig(type=TextSelectorType.NUMBER, autocomplete="12345")
-        ),
-    }
-)
+STEP_DRIVER_DATA_SCHEMA = vol.Schema({vol.Required("driver"): TextSelector()})
 
-OPTIONS_STEP_USER_DATA_SCHEMA = vol.Schema(
+STEP_ROSTER_DATA_SCHEMA = vol.Schema(
     {
-        vol.Required("username"): TextSelector(
-            TextSelectorConfig(type=TextSelectorType.EMAIL, autocomplete="username")
-        ),
-        vol.Required("password"): TextSelector(
-            TextSelectorConfig(
-                type=TextSelectorType.PASSWORD, autocomplete="current-password"
+        vol.Required(CONF_ROSTER_TYPE, default="league"): SelectSelector(
+            SelectSelectorConfig(
+                options=list(ROSTER_TYPES), translation_key="roster_type"
             )
         ),
+        vol.Required(CONF_ROSTER_ID): TextSelector(
+            TextSelectorConfig(type=TextSelectorType.NUMBER)
+        ),
+        vol.Optional(CONF_FOLLOWED, default=""): TextSelector(),
     }
 )
 
+# option key: default, minutes for the refresh intervals
+REFRESH_OPTIONS = {
+    "refresh_interval": DEFAULT_REFRESH_INTERVAL,
+    "min_refresh_interval": DEFAULT_MIN_REFRESH_INTERVAL,
+    "max_refresh_interval": DEFAULT_MAX_REFRESH_INTERVAL,
+}
+
+
+def options_schema(entry: config_entries.ConfigEntry) -> vol.Schema:
+    """Return the options schema of an entry, with the settings it uses."""
+    minutes = NumberSelector(
+        NumberSelectorConfig(
+            min=1, max=1440, mode=NumberSelectorMode.BOX, unit_of_measurement="min"
+        )
+    )
+    schema = {
+        vol.Required(key, default=entry.options.get(key, default)): minutes
+        for key, default in REFRESH_OPTIONS.items()
+        # a roster polls at a fixed interval
+        if key == "refresh_interval" or CONF_ROSTER_ID not in entry.data
+    }
+    if "username" in entry.data:
+        schema[
+            vol.Required(
+                "max_concurrent_requests",
+                default=entry.options.get(
+                    "max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS
+                ),
+            )
+        ] = NumberSelector(
+            NumberSelectorConfig(min=1, max=32, mode=NumberSelectorMode.BOX)
+        )
+    return vol.Schema(schema)
+
+
+async def validate_iracing_credentials(hass: HomeAssistant, data) -> None:
+    """Verify credentials, and the driver when one is given.
+
+    The new session is saved, the client set up next restores it instead of
+    logging in again.
+    """
+    session = async_create_clientsession(hass, auto_cleanup=False)
+    try:
+        client = irDataClient(
+            data["username"],
+            data["password"],
+            session=session,
+            session_store=Store(
+                hass, STORAGE_VERSION, STORAGE_KEY_SESSION, private=True
+            ),
+            restore_session=False,
+        )
+        await client.check_connection()
+        if "cust_id" in data and not await async_find_drivers(client, data["cust_id"]):
+            raise DriverNotFound
+    finally:
+        session.detach()
+
 
-def validate_iracing_credentials(data) -> None:
-    """Verify credentials"""
-    client = irDataClient(data["username"], data["password"])
-    client.check_connection()
+async def async_find_drivers(api, search: str) -> list[dict[str, Any]]:
+    """Return the drivers matching a customer ID or a name."""
+    search = search.strip()
+    if not search.isdigit():
+        return await api.drivers.async_search(search)
+    try:
+        member_info = await api.get_member(search, include_licenses=False)
+    except RuntimeError:
+        # unknown customer ID
+        return []
+    return [
+        {"cust_id": member["cust_id"], "display_name": member["display_name"]}
+        for member in member_info.get("members", [])
+    ]
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -74,6 +163,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        # cust_id: name of the drivers matching the last search
+        self._drivers: dict[str, str] = {}
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -87,15 +181,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             try:
                 if not credsAvailable:
-                    await self.hass.async_add_executor_job(
-                        validate_iracing_credentials, user_input
-                    )
+                    await validate_iracing_credentials(self.hass, user_input)
                 pass
             except IracingConnectionError:
                 errors["base"] = "cannot_connect"
             except IracingAuthError as err:
                 errors["base"] = "invalid_auth"
                 # raise ConfigEntryAuthFailed from err
+            except DriverNotFound:
+                errors["base"] = "driver_not_found"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
@@ -105,16 +199,129 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 )
 
         if credsAvailable:
-            return self.async_show_form(
-                step_id="user",
-                data_schema=STEP_USER_DATA_SCHEMA_NO_LOGIN,
-                errors=errors,
+            return self.async_show_menu(
+                step_id="user", menu_options=["driver", "roster"]
             )
         else:
             return self.async_show_form(
                 step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
             )
 
+    async def async_step_driver(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Search the driver to monitor by name or customer ID."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            search = user_input["driver"].strip()
+            api = self.hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"]
+            if not search.isdigit() and len(search) < MIN_SEARCH_LENGTH:
+                errors["base"] = "search_too_short"
+            else:
+                try:
+                    with request_priority(PRIORITY_INTERACTIVE):
+                        drivers = await async_find_drivers(api, search)
+                except IracingConnectionError:
+                    errors["base"] = "cannot_connect"
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected exception")
+                    errors["base"] = "unknown"
+                else:
+                    self._drivers = {
+                        str(driver["cust_id"]): driver["display_name"]
+                        for driver in drivers[:MAX_SEARCH_RESULTS]
+                    }
+                    if len(self._drivers) == 1:
+                        return self._async_create_driver_entry(
+                            next(iter(self._drivers))
+                        )
+                    if self._drivers:
+                        return await self.async_step_driver_select()
+                    errors["base"] = "driver_not_found"
+
+        return self.async_show_form(
+            step_id="driver", data_schema=STEP_DRIVER_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_driver_select(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Pick the driver among the search results."""
+        if user_input is not None:
+            return self._async_create_driver_entry(user_input["cust_id"])
+
+        return self.async_show_form(
+            step_id="driver_select",
+            data_schema=vol.Schema(
+                {
+                    vol.Required("cust_id"): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[
+                                SelectOptionDict(
+                                    value=cust_id, label=f"{name} ({cust_id})"
+                                )
+                                for cust_id, name in self._drivers.items()
+                            ]
+                        )
+                    )
+                }
+            ),
+        )
+
+    @callback
+    def _async_create_driver_entry(self, cust_id: str) -> FlowResult:
+        for entry in self._async_current_entries():
+            if entry.data.get("cust_id") == cust_id:
+                return self.async_abort(reason="already_configured")
+        return self.async_create_entry(
+            title=self._drivers.get(cust_id, cust_id), data={"cust_id": cust_id}
+        )
+
+    async def async_step_roster(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Follow the members of a league or a team."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            await self.async_set_unique_id(
+                f"{user_input[CONF_ROSTER_TYPE]}_{user_input[CONF_ROSTER_ID]}"
+            )
+            self._abort_if_unique_id_configured()
+            api = self.hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"]
+            try:
+                with request_priority(PRIORITY_INTERACTIVE):
+                    name, roster = await async_fetch_roster(
+                        api, user_input[CONF_ROSTER_TYPE], user_input[CONF_ROSTER_ID]
+                    )
+            except IracingConnectionError:
+                errors["base"] = "cannot_connect"
+            except RuntimeError:
+                errors["base"] = "roster_not_found"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                if not roster:
+                    errors["base"] = "roster_not_found"
+                else:
+                    followed = [
+                        cust_id.strip()
+                        for cust_id in user_input[CONF_FOLLOWED].split(",")
+                        if cust_id.strip()
+                    ]
+                    return self.async_create_entry(
+                        title=name,
+                        data={
+                            CONF_ROSTER_TYPE: user_input[CONF_ROSTER_TYPE],
+                            CONF_ROSTER_ID: user_input[CONF_ROSTER_ID],
+                            CONF_FOLLOWED: followed,
+                        },
+                    )
+
+        return self.async_show_form(
+            step_id="roster", data_schema=STEP_ROSTER_DATA_SCHEMA, errors=errors
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(
@@ -135,25 +342,23 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Manage the options."""
         errors: dict[str, str] = {}
         if user_input is not None:
-            try:
-                await self.hass.async_add_executor_job(
-                    validate_iracing_credentials, user_input
-                )
-            except IracingConnectionError:
-                errors["base"] = "cannot_connect"
-            except IracingAuthError as err:
-                errors["base"] = "invalid_auth"
-                # raise ConfigEntryAuthFailed from err
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
+            # the selectors return floats
+            for key in (*REFRESH_OPTIONS, "max_concurrent_requests"):
+                if key in user_input:
+                    user_input[key] = int(user_input[key])
+            if not (
+                user_input.get("min_refresh_interval", 1)
+                <= user_input["refresh_interval"]
+                <= user_input.get("max_refresh_interval", 1440)
+            ):
+                errors["base"] = "invalid_refresh_interval"
             else:
                 return self.async_create_entry(
-                    title=self.config_entry.data["cust_id"], data=user_input
+                    title=self.config_entry.title, data=user_input
                 )
 
         return self.async_show_form(
-            step_id="init", data_schema=OPTIONS_STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="init", data_schema=options_schema(self.config_entry), errors=errors
         )
 
 
@@ -163,3 +368,7 @@ class CannotConnect(HomeAssistantError):
 
 class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
+
+
+class DriverNotFound(HomeAssistantError):
+    """Error to indicate the customer ID matches no driver."""
@@ -3,4 +3,27 @@ from typing import Final
 
 DOMAIN = "iracing"
 DEFAULT_REFRESH_INTERVAL = 30
+DEFAULT_MIN_REFRESH_INTERVAL = 5
+DEFAULT_MAX_REFRESH_INTERVAL = 240
 DATA_CONFIG_ENTRY: Final = "config_entry"
+DATA_MEMBERS: Final = "members"
+DATA_SCHEDULER: Final = "scheduler"
+DATA_RESULTS: Final = "results"
+MEMBER_BATCH_SIZE = 50
+MEMBER_BATCH_MAX_AGE = 10
+CONF_ROSTER_TYPE: Final = "roster_type"
+CONF_ROSTER_ID: Final = "roster_id"
+CONF_FOLLOWED: Final = "followed"
+ROSTER_TYPES = ("league", "team")
+ROSTER_MAX_AGE = 6
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+STORAGE_VERSION = 1
+STORAGE_KEY_ASSETS = f"{DOMAIN}.assets"
+STORAGE_KEY_SESSION = f"{DOMAIN}.session"
+STORAGE_KEY_HISTORY = f"{DOMAIN}.history"
+STORAGE_KEY_SNAPSHOT = f"{DOMAIN}.snapshot"
+STORAGE_KEY_STATISTICS = f"{DOMAIN}.statistics"
+STORAGE_KEY_SCHEDULE = f"{DOMAIN}.schedule"
+RACE_HISTORY_SIZE = 200
+EVENT_RACE_RESULT: Final = f"{DOMAIN}_race_result"
+SERVICE_GET_RECENT_RESULTS: Final = "get_recent_results"
@@ -2,27 +2,147 @@
 
 from __future__ import annotations
 
-from datetime import date, timedelta
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
 from typing import Any
 
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
 
-from .const import DEFAULT_REFRESH_INTERVAL
+from .const import (
+    CONF_FOLLOWED,
+    CONF_ROSTER_ID,
+    CONF_ROSTER_TYPE,
+    EVENT_RACE_RESULT,
+    DEFAULT_MAX_REFRESH_INTERVAL,
+    DEFAULT_MIN_REFRESH_INTERVAL,
+    DEFAULT_REFRESH_INTERVAL,
+    MEMBER_BATCH_MAX_AGE,
+    MEMBER_BATCH_SIZE,
+    ROSTER_MAX_AGE,
+    STORAGE_KEY_SNAPSHOT,
+    STORAGE_VERSION,
+)
+from .history import RaceHistory
+from .iracingapi import IracingConnectionError
+from .laps import lap_statistics
+from .iracingapi.schedule import SeriesSchedule
+from .models import DriverSnapshot
+from .polling import AdaptivePolling
+from .results import SubsessionResults, latest_race
+from .scheduler import RefreshScheduler
+from .statistics_import import RatingStatistics
 
 _LOGGER = logging.getLogger(__name__)
 
+# delay before a changed snapshot is written to disk
+SNAPSHOT_SAVE_DELAY = 30
 
-class IracingDataUpdateCoordinator(DataUpdateCoordinator):
+
+def snapshot_store(hass: HomeAssistant, cust_id) -> Store:
+    """Return the store holding the last snapshot of a driver."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_SNAPSHOT}.{cust_id}")
+
+
+class IracingMemberBatcher:
+    """Fetch member data for all configured drivers in batched requests."""
+
+    def __init__(self, hass: HomeAssistant, api) -> None:
+        """Initialize the batcher."""
+        self.hass = hass
+        self.api = api
+        self.max_age = timedelta(minutes=MEMBER_BATCH_MAX_AGE)
+        self._cust_ids: set[str] = set()
+        self._members: dict[str, dict[str, Any]] = {}
+        # asked for but left out of the answer, e.g. a closed account
+        self._missing: set[str] = set()
+        self._last_fetch: datetime | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def cust_ids(self) -> frozenset[str]:
+        """Return the registered drivers."""
+        return frozenset(self._cust_ids)
+
+    def register(self, cust_id) -> None:
+        """Add a driver to the batched requests."""
+        self._cust_ids.add(str(cust_id))
+
+    def unregister(self, cust_id) -> None:
+        """Remove a driver from the batched requests."""
+        self._cust_ids.discard(str(cust_id))
+        self._members.pop(str(cust_id), None)
+        self._missing.discard(str(cust_id))
+
+    async def async_get_member(
+        self, cust_id, interval: timedelta | None = None
+    ) -> dict[str, Any] | None:
+        """Return the member data of a driver, refreshing the batch if stale.
+
+        A batch is reused for up to half the polling ``interval`` of the
+        caller, so each poll gets data fetched since its previous one. None
+        is returned when iRacing left the driver out of the answer.
+        """
+        cust_id = str(cust_id)
+        self.register(cust_id)
+        max_age = self.max_age if interval is None else min(self.max_age, interval / 2)
+        async with self._lock:
+            if (
+                self._last_fetch is None
+                or dt_util.utcnow() - self._last_fetch > max_age
+            ):
+                self._missing.clear()
+                await self._async_fetch(sorted(self._cust_ids))
+                self._last_fetch = dt_util.utcnow()
+            elif cust_id not in self._members and cust_id not in self._missing:
+                # driver added since the last batch, only fetch the missing ones
+                await self._async_fetch(
+                    sorted(self._cust_ids.difference(self._members, self._missing))
+                )
+        return self._members.get(cust_id)
+
+    async def _async_fetch(self, cust_ids: list[str]) -> None:
+        batches = await asyncio.gather(
+            *(
+                self.api.get_members(cust_ids[i : i + MEMBER_BATCH_SIZE])
+                for i in range(0, len(cust_ids), MEMBER_BATCH_SIZE)
+            )
+        )
+        returned = set()
+        for member_info in batches:
+            for member in member_info["members"]:
+                returned.add(str(member["cust_id"]))
+                self._members[str(member["cust_id"])] = member
+        # not asked for again before the next full batch
+        for cust_id in set(cust_ids).difference(returned):
+            self._members.pop(cust_id, None)
+            self._missing.add(cust_id)
+
+
+class IracingDataUpdateCoordinator(DataUpdateCoordinator[DriverSnapshot]):
     """Data update coordinator for the iRacing integration."""
 
     config_entry: ConfigEntry
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api,
+        members: IracingMemberBatcher,
+        scheduler: RefreshScheduler | None = None,
+        results: SubsessionResults | None = None,
+    ) -> None:
         """Initialize the coordinator."""
         super().__init__(
             hass=hass,
@@ -31,48 +151,53 @@ class IracingDataUpdateCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(
                 minutes=entry.options.get("refresh_interval", DEFAULT_REFRESH_INTERVAL)
             ),
+            # listeners are not called at all when nothing changed
+            always_update=False,
         )
         self.config_entry = entry
         self.api = api
+        self.polling = AdaptivePolling(
+            min_interval=timedelta(
+                minutes=entry.options.get(
+                    "min_refresh_interval", DEFAULT_MIN_REFRESH_INTERVAL
+                )
+            ),
+            base_interval=self.update_interval,
+            max_interval=timedelta(
+                minutes=entry.options.get(
+                    "max_refresh_interval", DEFAULT_MAX_REFRESH_INTERVAL
+                )
+            ),
+        )
+        self.members = members
+        self.scheduler = scheduler or RefreshScheduler()
+        self.results = results
+        self.members.register(entry.data["cust_id"])
+        self.history = RaceHistory(hass, entry.data["cust_id"])
+        self._snapshot_store = snapshot_store(hass, entry.data["cust_id"])
+        self.statistics = RatingStatistics(hass, api, entry.data["cust_id"])
+        # schedule of the series the driver races the most
+        self.schedule: SeriesSchedule | None = None
+        self._unsub_schedule: CALLBACK_TYPE | None = None
+        entry.async_on_unload(self._async_cancel_schedule_timer)
+        # snapshot slot: last race whose figures iRacing would not give
+        self._failed_races: dict[str, int] = {}
+        # keys whose value changed with the last refresh
+        self.changed_keys: set[str] = set()
+
+    async def async_restore(self) -> bool:
+        """Load the last persisted snapshot, return whether there was one."""
+        stored = await self._snapshot_store.async_load()
+        if not stored:
+            return False
+        self.data = DriverSnapshot.from_dict(stored)
+        return True
 
-    async def _async_update_data(self) -> dict[Platform, dict[str, Any]]:
+    async def _async_update_data(self) -> DriverSnapshot:
         """Get the latest data from iRacing and updates the state."""
 
         data = self.config_entry.data
-        res = {
-            "cust_id": data["cust_id"],
-            "sports_car_licence_ir": None,
-            "sports_car_licence_sr": None,
-            "sports_car_starts": None,
-            "sports_car_laps": None,
-            "sports_car_wins": None,
-            "sports_car_top5": None,
-            "formula_car_licence_ir": None,
-            "formula_car_licence_sr": None,
-            "formula_car_starts": None,
-            "formula_car_laps": None,
-            "formula_car_wins": None,
-            "formula_car_top5": None,
-            "dirt_road_licence_ir": None,
-            "dirt_road_licence_sr": None,
-            "dirt_road_starts": None,
-            "dirt_road_laps": None,
-            "dirt_road_wins": None,
-            "dirt_road_top5": None,
-            "oval_licence_ir": None,
-            "oval_licence_sr": None,
-            "oval_starts": None,
-            "oval_laps": None,
-            "oval_wins": None,
-            "oval_top5": None,
-            "dirt_oval_licence_ir": None,
-            "dirt_oval_licence_sr": None,
-            "dirt_oval_starts": None,
-            "dirt_oval_laps": None,
-            "dirt_oval_wins": None,
-            "dirt_oval_top5": None,
-            "name": None,
-        }
+        res = DriverSnapshot(data["cust_id"])
 
         client = self.api
 
@@ -81,97 +206,291 @@ class IracingDataUpdateCoordinator(DataUpdateCoordinator):
             return None
 
         try:
-            member_info = await self.hass.async_add_executor_job(
-                client.get_member, data["cust_id"]
-            )
-            licence_sports_car = next(
-                x
-                for x in member_info["members"][0]["licenses"]
-                if x["category_id"] == 5
-            )
-            licence_formula_car = next(
-                x
-                for x in member_info["members"][0]["licenses"]
-                if x["category_id"] == 6
-            )
-            licence_dirt_road = next(
-                x
-                for x in member_info["members"][0]["licenses"]
-                if x["category_id"] == 4
-            )
-            licence_oval = next(
-                x
-                for x in member_info["members"][0]["licenses"]
-                if x["category_id"] == 1
-            )
-            licence_dirt_oval = next(
-                x
-                for x in member_info["members"][0]["licenses"]
-                if x["category_id"] == 3
-            )
+            if not self.history.loaded:
+                await self.history.async_load()
+            if not self.statistics.loaded:
+                await self.statistics.async_load()
 
-            member_career = await self.hass.async_add_executor_job(
-                client.get_member_career, data["cust_id"]
-            )
-            carrer_sports_car = next(
-                x for x in member_career["stats"] if x["category_id"] == 5
-            )
-            carrer_formula_car = next(
-                x for x in member_career["stats"] if x["category_id"] == 6
+            # independent endpoints, the client caps the overall concurrency
+            async with self.scheduler.semaphore:
+                member, member_career, recent_results = await asyncio.gather(
+                    self.members.async_get_member(
+                        data["cust_id"], self.update_interval
+                    ),
+                    client.get_member_career(data["cust_id"]),
+                    client.get_recent_results(data["cust_id"]),
+                )
+            if member is None:
+                raise UpdateFailed(f"iRacing returned no member {data['cust_id']}")
+
+            # only the races not seen before are added to the history
+            backfill = len(self.history) == 0
+            new_races = self.history.ingest(recent_results["races"])
+            for race in reversed(new_races):
+                if not backfill:
+                    self.hass.bus.async_fire(
+                        EVENT_RACE_RESULT, {"cust_id": data["cust_id"], **race}
+                    )
+            if not self.statistics.backfilled:
+                # the recorder compiles the days after the import itself
+                self.statistics.async_schedule_import(self.config_entry)
+
+            res = DriverSnapshot.from_api(
+                data["cust_id"], member, member_career, self.history.last(5)
             )
-            carrer_dirt_road = next(
-                x for x in member_career["stats"] if x["category_id"] == 4
+            await self._async_update_schedule()
+            self._apply_schedule(res)
+            await self._async_update_latest_race(res)
+            await self._async_update_latest_laps(res)
+            _LOGGER.debug(
+                "Snapshot of %s uses %s bytes", data["cust_id"], res.memory_usage()
             )
-            carrer_oval = next(
-                x for x in member_career["stats"] if x["category_id"] == 1
+
+            # aligned on the slots of the entry, away from the other entries
+            self.update_interval = self.scheduler.next_delay(
+                self.config_entry.entry_id,
+                self.polling.next_interval(recent_results["races"]),
             )
-            carrer_dirt_oval = next(
-                x for x in member_career["stats"] if x["category_id"] == 3
+
+        except Exception as ex:
+            _LOGGER.info("Error getting member info from iracing: %s", ex)
+            if self.data is not None:
+                # keep the last known values, restored ones included
+                res = self.data
+
+        self.changed_keys = res.changed_keys(self.data)
+        if self.changed_keys and res.name is not None:
+            self._snapshot_store.async_delay_save(res.as_dict, SNAPSHOT_SAVE_DELAY)
+        return res
+
+    async def _async_update_latest_race(self, snapshot: DriverSnapshot) -> None:
+        """Set the full results of the last race, fetched once per race."""
+        if self.results is None:
+            return
+
+        async def fetch(subsession_id: int) -> dict[str, Any] | None:
+            # every monitored driver is extracted from the same download
+            summary = await self.results.async_get(subsession_id, self.members.cust_ids)
+            return latest_race(summary, self.config_entry.data["cust_id"])
+
+        await self._async_update_race_figures(snapshot, "latest_race", fetch)
+
+    async def _async_update_latest_laps(self, snapshot: DriverSnapshot) -> None:
+        """Set the lap time figures of the last race, fetched once per race."""
+
+        async def fetch(subsession_id: int) -> dict[str, Any]:
+            laps = await self.api.get_lap_data(
+                subsession_id, self.config_entry.data["cust_id"]
             )
+            return lap_statistics(subsession_id, laps)
+
+        await self._async_update_race_figures(snapshot, "latest_laps", fetch)
+
+    async def _async_update_race_figures(
+        self,
+        snapshot: DriverSnapshot,
+        slot: str,
+        fetch: Callable[[int], Awaitable[dict[str, Any] | None]],
+    ) -> None:
+        """Set a snapshot slot with figures of the last race.
+
+        The figures of the previous race are dropped as soon as a new race
+        shows up. A race iRacing answered an error for is not asked for
+        again, a team race has no lap data without its team for instance.
+        """
+        races = self.history.last(1)
+        if not races:
+            return
+        subsession_id = races[0]["subsession_id"]
+        previous = getattr(self.data, slot) if self.data else None
+        if previous and previous["subsession_id"] == subsession_id:
+            setattr(snapshot, slot, previous)
+            return
+        if self._failed_races.get(slot) == subsession_id:
+            return
+        try:
+            async with self.scheduler.semaphore:
+                figures = await fetch(subsession_id)
+        except IracingConnectionError as ex:
+            # tried again with the next refresh
+            _LOGGER.debug("Unable to get the %s of %s: %s", slot, subsession_id, ex)
+            return
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("No %s for %s: %s", slot, subsession_id, ex)
+            self._failed_races[slot] = subsession_id
+            return
+        setattr(snapshot, slot, figures)
+
+    async def _async_update_schedule(self) -> None:
+        """Get the schedule of the series the driver races the most."""
+        series_id = self.history.favourite_series()
+        if series_id is None:
+            return
+        try:
+            self.schedule = await self.api.schedules.async_get(series_id)
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("Unable to get the schedule of %s: %s", series_id, ex)
 
-            recent_results = await self.hass.async_add_executor_job(
-                client.get_recent_results, data["cust_id"]
+    def _apply_schedule(self, snapshot: DriverSnapshot) -> None:
+        """Set the next race and the current week, then wait for them to pass."""
+        self._async_cancel_schedule_timer()
+        if (schedule := self.schedule) is None:
+            return
+        now = dt_util.utcnow().timestamp()
+        if (week := schedule.week_at(now)) is not None:
+            snapshot.current_week = {
+                "series_id": schedule.series_id,
+                "series_name": schedule.series_name,
+                "season_name": week["season_name"],
+                "race_week": week["race_week_num"] + 1,
+                "track": week["track_name"],
+                "config_name": week["config_name"],
+                "week_end": dt_util.utc_from_timestamp(week["end"]).isoformat(),
+            }
+        if (start := schedule.next_session(now)) is not None:
+            race_week = schedule.week_at(start) or {}
+            snapshot.next_race = {
+                "start": dt_util.utc_from_timestamp(start).isoformat(),
+                "series_id": schedule.series_id,
+                "series_name": schedule.series_name,
+                "track": race_week.get("track_name"),
+                "config_name": race_week.get("config_name"),
+            }
+        if (change := schedule.next_change(now)) is not None:
+            self._unsub_schedule = async_track_point_in_utc_time(
+                self.hass,
+                self._async_schedule_changed,
+                dt_util.utc_from_timestamp(change),
             )
 
-            res["sports_car_licence_ir"] = licence_sports_car.get("irating", None)
-            res["sports_car_licence_sr"] = licence_sports_car["safety_rating"]
-            res["sports_car_starts"] = carrer_sports_car["starts"]
-            res["sports_car_laps"] = carrer_sports_car["laps"]
-            res["sports_car_wins"] = carrer_sports_car["wins"]
-            res["sports_car_top5"] = carrer_sports_car["top5"]
-
-            res["formula_car_licence_ir"] = licence_formula_car.get("irating", None)
-            res["formula_car_licence_sr"] = licence_formula_car["safety_rating"]
-            res["formula_car_starts"] = carrer_formula_car["starts"]
-            res["formula_car_laps"] = carrer_formula_car["laps"]
-            res["formula_car_wins"] = carrer_formula_car["wins"]
-            res["formula_car_top5"] = carrer_formula_car["top5"]
-
-            res["dirt_road_licence_ir"] = licence_dirt_road.get("irating", None)
-            res["dirt_road_licence_sr"] = licence_dirt_road["safety_rating"]
-            res["dirt_road_starts"] = carrer_dirt_road["starts"]
-            res["dirt_road_laps"] = carrer_dirt_road["laps"]
-            res["dirt_road_wins"] = carrer_dirt_road["wins"]
-            res["dirt_road_top5"] = carrer_dirt_road["top5"]
-
-            res["oval_licence_ir"] = licence_oval.get("irating", None)
-            res["oval_licence_sr"] = licence_oval["safety_rating"]
-            res["oval_starts"] = carrer_oval["starts"]
-            res["oval_laps"] = carrer_oval["laps"]
-            res["oval_wins"] = carrer_oval["wins"]
-            res["oval_top5"] = carrer_oval["top5"]
-
-            res["dirt_oval_licence_ir"] = licence_dirt_oval.get("irating", None)
-            res["dirt_oval_licence_sr"] = licence_dirt_oval["safety_rating"]
-            res["dirt_oval_starts"] = carrer_dirt_oval["starts"]
-            res["dirt_oval_laps"] = carrer_dirt_oval["laps"]
-            res["dirt_oval_wins"] = carrer_dirt_oval["wins"]
-            res["dirt_oval_top5"] = carrer_dirt_oval["top5"]
-
-            res["name"] = member_info["members"][0]["display_name"]
-            res["recent_results"] = {"recent_results": recent_results["races"][:5]}
+    @callback
+    def _async_schedule_changed(self, _now: datetime) -> None:
+        """Move on to the next session or race week, without polling the API."""
+        self._unsub_schedule = None
+        if self.data is None:
+            return
+        snapshot = DriverSnapshot.from_dict(self.data.as_dict())
+        snapshot.next_race = snapshot.current_week = None
+        self._apply_schedule(snapshot)
+        self.changed_keys = snapshot.changed_keys(self.data)
+        self.data = snapshot
+        self.async_update_listeners()
+
+    @callback
+    def _async_cancel_schedule_timer(self) -> None:
+        if self._unsub_schedule is not None:
+            self._unsub_schedule()
+            self._unsub_schedule = None
+
+
+async def async_fetch_roster(api, roster_type: str, roster_id) -> tuple[str, list[str]]:
+    """Return the name and the member ids of a league or team."""
+    if roster_type == "team":
+        team = await api.get_team(roster_id)
+        name = team.get("team_name") or f"Team {roster_id}"
+        roster = team.get("roster", [])
+    else:
+        league = await api.get_league_roster(roster_id)
+        # the roster may come wrapped in a data object
+        roster = league.get("roster") or league.get("data", {}).get("roster", [])
+        name = f"League {roster_id}"
+    return name, [str(member["cust_id"]) for member in roster]
+
+
+class IracingRosterCoordinator(DataUpdateCoordinator[dict[str, DriverSnapshot]]):
+    """Follow the members of a league or team.
+
+    The roster is split in shards of one member/get batch each, and every
+    poll refreshes the next shard: a full round takes the refresh interval
+    whatever the roster size, with a single request per poll.
+    """
+
+    config_entry: ConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api,
+        scheduler: RefreshScheduler | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        self.refresh_interval = timedelta(
+            minutes=entry.options.get("refresh_interval", DEFAULT_REFRESH_INTERVAL)
+        )
+        super().__init__(
+            hass=hass,
+            logger=_LOGGER,
+            name=entry.title,
+            update_interval=self.refresh_interval,
+            always_update=False,
+        )
+        self.config_entry = entry
+        self.api = api
+        self.scheduler = scheduler or RefreshScheduler()
+        self.followed: set[str] = set(entry.data.get(CONF_FOLLOWED, []))
+        self.roster: list[str] = []
+        self._roster_fetched: datetime | None = None
+        self._shard = 0
+        # a manual refresh must not poll the same shard as a scheduled one
+        self._lock = asyncio.Lock()
+        # members whose values changed with the last refresh
+        self.changed_members: set[str] = set()
+
+    @property
+    def shards(self) -> list[list[str]]:
+        """Return the roster split in member/get batches."""
+        return [
+            self.roster[i : i + MEMBER_BATCH_SIZE]
+            for i in range(0, len(self.roster), MEMBER_BATCH_SIZE)
+        ]
+
+    async def _async_update_data(self) -> dict[str, DriverSnapshot]:
+        """Refresh the next shard of the roster."""
+        async with self._lock:
+            data = dict(self.data or {})
+            self.changed_members = await self._async_update_shard(data)
+            return data
+
+    async def _async_update_shard(self, data: dict[str, DriverSnapshot]) -> set[str]:
+        """Update the members of the next shard in data, return the changed ones."""
+        changed: set[str] = set()
+        try:
+            if self._shard == 0 and (
+                self._roster_fetched is None
+                or dt_util.utcnow() - self._roster_fetched
+                > timedelta(hours=ROSTER_MAX_AGE)
+            ):
+                _, roster = await async_fetch_roster(
+                    self.api,
+                    self.config_entry.data[CONF_ROSTER_TYPE],
+                    self.config_entry.data[CONF_ROSTER_ID],
+                )
+                self.roster = sorted(roster)
+                self._roster_fetched = dt_util.utcnow()
+                for cust_id in set(data).difference(self.roster):
+                    del data[cust_id]
+
+            shards = self.shards
+            if not shards:
+                return changed
+            shard = shards[self._shard % len(shards)]
+            self._shard = (self._shard + 1) % len(shards)
+            async with self.scheduler.semaphore:
+                member_info = await self.api.get_members(shard)
+            for member in member_info["members"]:
+                cust_id = str(member["cust_id"])
+                snapshot = DriverSnapshot.from_api(cust_id, member, {"stats": []}, [])
+                if data.get(cust_id) != snapshot:
+                    changed.add(cust_id)
+                    data[cust_id] = snapshot
+
+            # spread the shards evenly over the refresh interval
+            self.update_interval = self.scheduler.next_delay(
+                self.config_entry.entry_id, self.refresh_interval / len(shards)
+            )
 
         except Exception as ex:
-            _LOGGER.info("Error getting member info from iracing: %s", ex)
+            _LOGGER.info("Error getting roster info from iracing: %s", ex)
 
-        return res
+        return changed
@@ -0,0 +1,63 @@
+"""Diagnostics support for the iRacing integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_CONFIG_ENTRY, DATA_RESULTS
+from .coordinator import IracingRosterCoordinator
+
+TO_REDACT = {"username", "password"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][DATA_CONFIG_ENTRY]
+    coordinator = data[entry.entry_id]
+    api = data["api"]
+    results = data[DATA_RESULTS]
+
+    if isinstance(coordinator, IracingRosterCoordinator):
+        coordinator_data = {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "members": len(coordinator.roster),
+            "shards": len(coordinator.shards),
+            "followed": len(coordinator.followed),
+            "tracked": len(coordinator.data or {}),
+        }
+    else:
+        coordinator_data = {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "idle_polls": coordinator.polling.idle_polls,
+            "history_size": len(coordinator.history),
+            "data": coordinator.data.as_dict() if coordinator.data else None,
+        }
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": coordinator_data,
+        "api": api.metrics.as_dict(),
+        "cache": {
+            "entries": len(api.cache),
+            "hits": api.cache.hits,
+            "misses": api.cache.misses,
+        },
+        "results_cache": {
+            "entries": len(results),
+            "bytes": results.size,
+        },
+        "circuit_breaker": api.breaker.as_dict(),
+        "ratelimit": {
+            "limit": api.ratelimit.limit,
+            "remaining": api.ratelimit.remaining,
+            "reset": api.ratelimit.reset,
+        },
+    }
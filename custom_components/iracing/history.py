@@ -0,0 +1,126 @@
+"""Rolling race history of a driver for the iRacing integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import RACE_HISTORY_SIZE, STORAGE_KEY_HISTORY, STORAGE_VERSION
+
+# delay before a changed history is written to disk
+SAVE_DELAY = 30
+
+# fields of member_recent_races kept for every race
+RESULT_FIELDS = (
+    "subsession_id",
+    "session_start_time",
+    "series_id",
+    "series_name",
+    "car_id",
+    "car_name",
+    "license_level",
+    "start_position",
+    "finish_position",
+    "laps",
+    "laps_led",
+    "incidents",
+    "points",
+    "strength_of_field",
+    "oldi_rating",
+    "newi_rating",
+    "old_sub_level",
+    "new_sub_level",
+    "winner_name",
+)
+TRACK_FIELDS = ("track_id", "track_name", "config_name")
+
+
+def compact_result(race: dict[str, Any]) -> dict[str, Any]:
+    """Return a race result trimmed to the fields the integration exposes."""
+    result = {field: race.get(field) for field in RESULT_FIELDS}
+    result["track"] = {
+        field: race.get("track", {}).get(field) for field in TRACK_FIELDS
+    }
+    return result
+
+
+def history_store(hass: HomeAssistant, cust_id) -> Store:
+    """Return the store holding the race history of a driver."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_HISTORY}.{cust_id}")
+
+
+class RaceHistory:
+    """Races of a driver keyed by subsession, indexed by start time."""
+
+    def __init__(
+        self, hass: HomeAssistant, cust_id, max_races: int = RACE_HISTORY_SIZE
+    ) -> None:
+        """Initialize the history."""
+        self._store = history_store(hass, cust_id)
+        self.max_races = max_races
+        self._races: dict[int, dict[str, Any]] = {}
+        # (start timestamp, subsession id), oldest first
+        self._index: list[tuple[float, int]] = []
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._races)
+
+    async def async_load(self) -> None:
+        """Load the persisted history."""
+        stored = await self._store.async_load()
+        self.loaded = True
+        if stored:
+            self._add([compact_result(race) for race in stored["races"]])
+
+    def ingest(self, races: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Add the races not seen before and return them, newest first."""
+        new_races = [
+            compact_result(race)
+            for race in races
+            if race["subsession_id"] not in self._races
+        ]
+        if new_races:
+            self._add(new_races)
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return sorted(new_races, key=self._start_timestamp, reverse=True)
+
+    def last(self, count: int) -> list[dict[str, Any]]:
+        """Return the last races, newest first."""
+        return [self._races[sid] for _, sid in reversed(self._index[-count:])]
+
+    def since(self, when: datetime) -> list[dict[str, Any]]:
+        """Return the races started at or after a given time, newest first."""
+        position = bisect_left(self._index, (when.timestamp(),))
+        return [self._races[sid] for _, sid in reversed(self._index[position:])]
+
+    def favourite_series(self) -> int | None:
+        """Return the series the driver raced the most in the history."""
+        counts = Counter(
+            race["series_id"]
+            for race in self._races.values()
+            if race.get("series_id") is not None
+        )
+        return counts.most_common(1)[0][0] if counts else None
+
+    def _add(self, races: list[dict[str, Any]]) -> None:
+        for race in races:
+            self._races[race["subsession_id"]] = race
+            insort(self._index, (self._start_timestamp(race), race["subsession_id"]))
+        while len(self._index) > self.max_races:
+            _, sid = self._index.pop(0)
+            del self._races[sid]
+
+    @staticmethod
+    def _start_timestamp(race: dict[str, Any]) -> float:
+        start = dt_util.parse_datetime(race.get("session_start_time") or "")
+        return start.timestamp() if start else 0.0
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"races": [self._races[sid] for _, sid in self._index]}
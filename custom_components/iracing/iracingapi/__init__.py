@@ -1,2 +1,3 @@
 """iRacing Data API"""
 from .iracingapi import *
+from .ratelimit import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, request_priority
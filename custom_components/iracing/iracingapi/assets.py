@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+# kind: (endpoint, id key, fields kept in the cache)
+ASSET_TYPES = {
+    "cars": ("/data/car/get", "car_id", ("car_name", "car_name_abbreviated")),
+    "tracks": ("/data/track/get", "track_id", ("track_name", "config_name")),
+    "series": ("/data/series/get", "series_id", ("series_name", "series_short_name")),
+}
+ASSET_TTL = 7 * 24 * 3600
+# minimum delay between two refreshes triggered by an unknown id
+ASSET_MISS_REFRESH_INTERVAL = 3600
+
+
+class AssetCache:
+    """Cars, tracks and series catalogs, persisted and refreshed on expiry or miss.
+
+    The store only needs the ``async_load``/``async_save`` coroutines of Home
+    Assistant's ``Store``; without one the catalogs live in memory only.
+    """
+
+    def __init__(self, client, store=None, ttl=ASSET_TTL):
+        self._client = client
+        self._store = store
+        self._ttl = ttl
+        self._assets = None
+        self._miss_refreshed = {}
+        self._lock = asyncio.Lock()
+
+    async def async_get(self, kind, asset_id):
+        return (await self.async_get_many(kind, [asset_id])).get(str(asset_id))
+
+    async def async_get_many(self, kind, asset_ids):
+        """Return the cached assets of a kind for the given ids, keyed by str id."""
+        asset_ids = {str(asset_id) for asset_id in asset_ids}
+        async with self._lock:
+            if self._assets is None:
+                self._assets = (
+                    await self._store.async_load() if self._store else None
+                ) or {}
+
+            catalog = self._assets.get(kind)
+            missing = catalog is not None and not asset_ids.issubset(catalog["items"])
+            if catalog is None:
+                catalog = await self._async_refresh(kind)
+            elif time.time() - catalog["fetched"] > self._ttl or (
+                # new content released since the last download, refresh once
+                missing
+                and time.time() - self._miss_refreshed.get(kind, 0)
+                > ASSET_MISS_REFRESH_INTERVAL
+            ):
+                if missing:
+                    self._miss_refreshed[kind] = time.time()
+                try:
+                    catalog = await self._async_refresh(kind)
+                except Exception as err:  # pylint: disable=broad-except
+                    # a stale catalog is better than failing the caller
+                    self._client.log_error(f"Unable to refresh {kind}: {err}")
+
+        items = catalog["items"]
+        return {
+            asset_id: items[asset_id] for asset_id in asset_ids if asset_id in items
+        }
+
+    async def _async_refresh(self, kind):
+        endpoint, id_key, fields = ASSET_TYPES[kind]
+        # bypass the response cache and the cached link to the previous
+        # document, a refresh must reach the API
+        key = self._client.cache.key(endpoint)
+        self._client.cache.pop(key)
+        self._client.cache.pop(("link",) + key)
+        objects = await self._client._get_resource(endpoint)
+        self._assets[kind] = {
+            "fetched": time.time(),
+            "items": {
+                str(obj[id_key]): {field: obj.get(field) for field in fields}
+                for obj in objects
+            },
+        }
+        if self._store:
+            await self._store.async_save(self._assets)
+        return self._assets[kind]
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+
+# seconds a response stays valid, endpoints not listed are never cached
+ENDPOINT_TTLS = {
+    "/data/member/get": 60,
+    "/data/stats/member_career": 15 * 60,
+    "/data/stats/member_recent_races": 60,
+    "/data/league/roster": 3600,
+    "/data/team/get": 3600,
+    "/data/car/get": 24 * 3600,
+    "/data/track/get": 24 * 3600,
+    "/data/series/get": 24 * 3600,
+}
+RESPONSE_CACHE_SIZE = 512
+# signed links are dropped this long before their announced expiry
+LINK_EXPIRY_MARGIN = 10
+
+
+class ResponseCache:
+    """LRU cache of Data API responses with a TTL per endpoint.
+
+    Concurrent requests for the same key share a single fetch.
+    """
+
+    def __init__(self, ttls=None, maxsize=RESPONSE_CACHE_SIZE):
+        self.ttls = ENDPOINT_TTLS if ttls is None else ttls
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(endpoint, params=None):
+        return (endpoint, tuple(sorted((params or {}).items())))
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, 0)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_fetch(self, key, ttl, fetch):
+        if ttl <= 0:
+            return await fetch()
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if key in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        # the fetch belongs to the cache: a caller cancelled while waiting
+        # for it does not cancel it for the others
+        task = asyncio.get_running_loop().create_task(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(partial(self._fetched, key, ttl))
+        return await asyncio.shield(task)
+
+    def _fetched(self, key, ttl, task):
+        del self._inflight[key]
+        # also marks the exception as retrieved when nobody waits anymore
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result(), ttl)
+
+
+def link_ttl(expires, ttl):
+    """Return how long a signed link can be reused, capped by the endpoint TTL."""
+    try:
+        expires_at = datetime.fromisoformat(expires.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return 0
+    return min(ttl, expires_at.timestamp() - time.time() - LINK_EXPIRY_MARGIN)
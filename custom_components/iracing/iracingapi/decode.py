@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def loads(data):
+    """Decode a JSON document, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _matches(obj, where):
+    return not where or (
+        isinstance(obj, dict)
+        and all(
+            obj.get(k) in v if isinstance(v, frozenset) else obj.get(k) == v
+            for k, v in where.items()
+        )
+    )
+
+
+def select(data, paths):
+    """Pick the items at ijson-style prefixes out of a decoded document.
+
+    ``paths`` maps a prefix such as ``"session_results.item.results.item"``
+    to an optional dict of field values the items must have, a frozenset
+    value accepting any of its members.
+    """
+    selected = {}
+    for prefix, where in paths.items():
+        nodes = [data]
+        for part in prefix.split(".") if prefix else ():
+            if part == "item":
+                nodes = [
+                    item for node in nodes if isinstance(node, list) for item in node
+                ]
+            else:
+                nodes = [
+                    node[part]
+                    for node in nodes
+                    if isinstance(node, dict) and part in node
+                ]
+        selected[prefix] = [node for node in nodes if _matches(node, where)]
+    return selected
+
+
+def _select_body(body, paths):
+    return select(loads(body), paths)
+
+
+async def stream_select(reader, paths):
+    """Same as ``select`` but parsing an async byte stream incrementally.
+
+    A single prefix is picked by an ijson push parser fed one chunk at a
+    time, so only the selected items are built and a large document is never
+    held in memory. Several prefixes would each need a pass of their own, or
+    a Python loop over every event: the body is then read whole, decoded once
+    and the items selected from it in the default executor, so a document of
+    several MB does not block the event loop. The same happens without ijson.
+    """
+    if ijson is None or len(paths) != 1:
+        body = await reader.read()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, _select_body, body, paths
+        )
+
+    [(prefix, where)] = paths.items()
+    items = ijson.sendable_list()
+    coro = ijson.items_coro(items, prefix, use_float=True)
+    selected = []
+
+    def drain():
+        selected.extend(item for item in items if _matches(item, where))
+        del items[:]
+
+    try:
+        while chunk := await reader.read(STREAM_CHUNK_SIZE):
+            coro.send(chunk)
+            drain()
+        coro.close()
+    except ijson.JSONError as err:
+        # reported like the decoding errors of ``loads``
+        raise ValueError(str(err)) from err
+    drain()
+    return {prefix: selected}
+
+
+def paths_key(paths):
+    """Return a hashable form of a paths mapping, for cache keys."""
+    if not paths:
+        return ()
+    return tuple(
+        sorted(
+            (prefix, tuple(sorted((where or {}).items())))
+            for prefix, where in paths.items()
+        )
+    )
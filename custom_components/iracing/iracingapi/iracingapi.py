@@ -1,25 +1,70 @@
+import asyncio
 import base64
 import hashlib
 import time
-from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from http.cookies import SimpleCookie
 
-import requests
+import aiohttp
+from yarl import URL
+
+from .assets import AssetCache
+from .cache import ResponseCache, link_ttl
+from .decode import loads, paths_key, select, stream_select
+from .lookup import LOOKUP_ENDPOINT, DriverLookup
+from .metrics import ClientMetrics
+from .ratelimit import PrioritySemaphore, RateLimiter
+from .retry import DEFAULT_TIMEOUT, CircuitBreaker, RetryPolicy
+from .schedule import ScheduleCache
+
+# lifetime given to persisted auth cookies that carry no expiry of their own
+SESSION_COOKIE_TTL = 24 * 3600
 
 
 class irDataClient:
-    def __init__(self, username=None, password=None, logger=None):
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        logger=None,
+        session=None,
+        max_concurrency=None,
+        asset_store=None,
+        session_store=None,
+        retry=None,
+        restore_session=True,
+        schedule_store=None,
+    ):
         self.authenticated = False
-        self.session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(pool_connections=30, pool_maxsize=30)
-        self.session.mount("https://", adapter)
+        # an injected session (Home Assistant's pooled one) is owned by the caller
+        self.session = session
+        self._owns_session = session is None
 
         self.base_url = "https://members-ng.iracing.com"
 
         self.username = username
         self.encoded_password = self._encode_password(username, password)
-        self.car_names = {}
-        self.authenticating = False
+        self.assets = AssetCache(self, asset_store)
+        self.drivers = DriverLookup(self)
+        self.schedules = ScheduleCache(self, schedule_store)
+        self.ratelimit = RateLimiter()
+        self.cache = ResponseCache()
+        self.metrics = ClientMetrics()
+        self.retry = retry or RetryPolicy()
+        # shared by every caller, so all coordinators back off together
+        self.breaker = CircuitBreaker()
         self.logger = logger
+        # single-flight login: one /auth at a time, bumped on every new session
+        self._auth_lock = asyncio.Lock()
+        self._auth_generation = 0
+        self._session_store = session_store
+        # without restoring, the first call logs in and saves its own session
+        self._session_restored = session_store is None or not restore_session
+        # caps the in-flight requests shared by every caller of this client,
+        # interactive requests first
+        self._semaphore = (
+            PrioritySemaphore(max_concurrency) if max_concurrency else None
+        )
 
     def log_error(self, message):
         if self.logger:
@@ -36,126 +81,393 @@ class irDataClient:
 
         return base64.b64encode(initial_hash).decode("utf-8")
 
-    def check_connection(self):
-        self._login()
+    def _get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=DEFAULT_TIMEOUT)
+        return self.session
 
-    def _login(self):
-        headers = {"Content-Type": "application/json"}
-        data = {"email": self.username, "password": self.encoded_password}
-        if self.authenticating:
-            self.log_info("Authenticating in progress, waiting")
+    async def close(self):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
 
-            for _ in range(10):
-                time.sleep(2)
-                if not self.authenticating:
-                    self.log_info("Authenticating done, continuing")
-                    break
+    async def check_connection(self):
+        await self._login()
 
-        if self.authenticated:
-            return
-        try:
-            self.authenticating = True
-            r = self.session.post(
-                "https://members-ng.iracing.com/auth",
-                headers=headers,
-                json=data,
-                timeout=5.0,
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            raise IracingConnectionError(
+                "iRacing API unavailable, next attempt in %ds" % self.breaker.retry_in
             )
-        except requests.Timeout:
-            raise IracingConnectionError("Login timed out")
-        except requests.ConnectionError:
-            raise IracingConnectionError("Connection error")
-        else:
-            response_data = r.json()
-            if r.status_code == 200 and response_data.get("authcode"):
+
+    async def _login(self, stale_generation=None):
+        async with self._auth_lock:
+            if self.authenticated and self._auth_generation != stale_generation:
+                # logged in by another caller while waiting for the lock
+                return
+            if not self._session_restored:
+                self._session_restored = True
+                if await self._restore_session():
+                    self.log_info("Restored previous session")
+                    return
+
+            headers = {"Content-Type": "application/json"}
+            data = {"email": self.username, "password": self.encoded_password}
+            self.authenticated = False
+            self._check_breaker()
+            try:
+                async with self._get_session().post(
+                    self._build_url("/auth"),
+                    headers=headers,
+                    json=data,
+                    timeout=self.retry.login_timeout,
+                ) as r:
+                    status = r.status
+                    body = await r.read()
+            except asyncio.TimeoutError:
+                self.breaker.failure()
+                raise IracingConnectionError("Login timed out")
+            except aiohttp.ClientError:
+                self.breaker.failure()
+                raise IracingConnectionError("Connection error")
+            except BaseException:
+                # cancelled or failed without an answer, never leave a probe open
+                self.breaker.abandon()
+                raise
+            if self.retry.retryable(status):
+                self.breaker.failure()
+                raise IracingConnectionError("Login failed, status: " + str(status))
+            try:
+                response_data = loads(body)
+            except ValueError:
+                # an error page is reported by its status below
+                if status == 200:
+                    self.breaker.failure()
+                    raise IracingConnectionError("Invalid login response")
+                response_data = None
+            self.breaker.success()
+
+            if (
+                status == 200
+                and isinstance(response_data, dict)
+                and response_data.get("authcode")
+            ):
                 self.authenticated = True
-                self.authenticating = False
-                self._get_assets()
+                self._auth_generation += 1
                 self.log_info("Successful login")
+                await self._save_session()
             else:
-                self.log_error("Failed login, status: " + str(r.status_code))
+                self.log_error("Failed login, status: " + str(status))
                 raise IracingAuthError("Error from iRacing: ", response_data)
 
-    def _get_assets(self):
-        self._cars()
-
-    def _add_assets(self, objects, assets, id_key):
+    async def _restore_session(self):
+        stored = await self._session_store.async_load()
+        if (
+            not stored
+            or not stored.get("cookies")
+            or stored.get("username") != self.username
+            or stored.get("expires", 0) <= time.time()
+        ):
+            return False
+        cookies = SimpleCookie()
+        for cookie in stored["cookies"]:
+            cookies[cookie["name"]] = cookie["value"]
+            cookies[cookie["name"]]["domain"] = cookie["domain"]
+            cookies[cookie["name"]]["path"] = cookie["path"]
+        self._get_session().cookie_jar.update_cookies(cookies, URL(self.base_url))
+        self.authenticated = True
+        self._auth_generation += 1
+        return True
+
+    async def _save_session(self):
+        if self._session_store is None:
+            return
+        cookies = []
+        expires = time.time() + SESSION_COOKIE_TTL
+        host = URL(self.base_url).host
+        for morsel in self._get_session().cookie_jar:
+            if not host.endswith(morsel["domain"].lstrip(".")):
+                continue
+            if morsel["max-age"]:
+                expires = min(expires, time.time() + int(morsel["max-age"]))
+            elif morsel["expires"]:
+                try:
+                    expires = min(
+                        expires, parsedate_to_datetime(morsel["expires"]).timestamp()
+                    )
+                except (TypeError, ValueError):
+                    pass
+            cookies.append(
+                {
+                    "name": morsel.key,
+                    "value": morsel.value,
+                    "domain": morsel["domain"],
+                    "path": morsel["path"] or "/",
+                }
+            )
+        await self._session_store.async_save(
+            {"username": self.username, "expires": expires, "cookies": cookies}
+        )
+
+    async def _add_assets(self, objects, kind, id_key):
+        assets = await self.assets.async_get_many(
+            kind, [obj[id_key] for obj in objects]
+        )
         for obj in objects:
-            a = assets[str(obj[id_key])]
+            a = assets.get(str(obj[id_key]), {})
             for key in a.keys():
                 obj[key] = a[key]
         return objects
 
-    def _cars(self):
-        cars = self.get_cars()
-        for car in cars:
-            self.car_names[car["car_id"]] = car["car_name"]
-
-    def _get_resource_or_link(self, url, params=None):
-        if not self.authenticated:
-            self._login()
-            return self._get_resource_or_link(url, params=params)
-
-        r = self.session.get(url, params=params)
-
-        if r.status_code == 401:
-            # unauthorised, likely due to a timeout, retry after a login
-            self.authenticated = False
-            return self._get_resource_or_link(url, params=params)
-
-        if r.status_code == 429:
-            self.log_info("Rate limited, waiting...")
-
-            ratelimit_reset = r.headers.get("x-ratelimit-reset")
-            if ratelimit_reset:
-                reset_datetime = datetime.fromtimestamp(int(ratelimit_reset))
-                delta = reset_datetime - datetime.now()
-                if delta.total_seconds() > 0:
-                    time.sleep(delta.total_seconds())
-            self.log_info("Rate limited, end of wait")
-            return self._get_resource_or_link(url, params=params)
-
-        if r.status_code != 200:
-            self.log_error("API for " + url + "answsered " + str(r.status_code))
-
-            raise RuntimeError("Unhandled Non-200 response", r)
-        data = r.json()
-        r.close()
+    def _build_params(self, params):
+        if params is None:
+            return None
+        # aiohttp only accepts str/int/float query values
+        return {
+            k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()
+        }
+
+    async def _request(self, url, params=None, paths=None, endpoint=None, link=False):
+        """Send a request, recorded under ``endpoint`` (the URL path by default).
+
+        Connection errors, timeouts, undecodable bodies and 5xx answers are
+        retried with backoff, behind the circuit breaker. The last 5xx answer
+        is returned as is.
+        """
+        attempt = 0
+        while True:
+            self._check_breaker()
+            try:
+                if self._semaphore is None:
+                    result = await self._send(url, params, paths, endpoint, link)
+                else:
+                    async with self._semaphore:
+                        result = await self._send(url, params, paths, endpoint, link)
+            except IracingConnectionError:
+                self.breaker.failure()
+                if attempt + 1 >= self.retry.max_attempts:
+                    raise
+            except BaseException:
+                # cancelled or failed without an answer, never leave a probe open
+                self.breaker.abandon()
+                raise
+            else:
+                if not self.retry.retryable(result[0]):
+                    self.breaker.success()
+                    return result
+                self.breaker.failure()
+                if attempt + 1 >= self.retry.max_attempts:
+                    return result
+            self.metrics.retries += 1
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    async def _send(self, url, params=None, paths=None, endpoint=None, link=False):
+        status, size = None, 0
+        start = time.monotonic()
+        # aiohttp negotiates gzip/deflate and decompresses while reading
+        try:
+            async with self._get_session().get(
+                url, params=self._build_params(params), timeout=self.retry.timeout
+            ) as r:
+                status = r.status
+                headers = r.headers
+                if status != 200:
+                    data = None
+                elif paths:
+                    data = await stream_select(r.content, paths)
+                else:
+                    data = loads(await r.read())
+                size = r.content.total_bytes
+        except asyncio.TimeoutError:
+            raise IracingConnectionError("Request timed out: " + url)
+        except aiohttp.ClientError as err:
+            raise IracingConnectionError("Connection error: " + str(err))
+        except ValueError:
+            # truncated or garbled body, e.g. an error page served with a 200
+            raise IracingConnectionError("Invalid response: " + url)
+        finally:
+            self.metrics.record(
+                endpoint or URL(url).path,
+                status,
+                time.monotonic() - start,
+                size,
+                link=link,
+            )
+        return status, headers, data
+
+    async def _get_resource_or_link(self, url, params=None):
+        reauthenticated = False
+        rate_limited = 0
+        while True:
+            if not self.authenticated:
+                await self._login()
+            generation = self._auth_generation
+
+            await self.ratelimit.acquire()
+            status, headers, data = await self._request(url, params=params)
+            self.ratelimit.update(headers)
+            self.metrics.update_ratelimit(headers)
+
+            if status == 401:
+                # unauthorised, likely due to an expired session, login once and retry
+                if reauthenticated:
+                    raise IracingAuthError("Unauthorized after a new login", url)
+                reauthenticated = True
+                self.metrics.reauths += 1
+                await self._login(stale_generation=generation)
+                continue
+
+            if status == 429:
+                rate_limited += 1
+                self.metrics.rate_limited += 1
+                self.ratelimit.exhausted(headers)
+                if rate_limited > self.retry.max_rate_limited:
+                    raise IracingConnectionError("Still rate limited: " + url)
+                # queued again behind the limiter until the window resets
+                self.log_info("Rate limited, waiting...")
+                continue
+            break
+
+        if status != 200:
+            self.log_error("API for " + url + "answsered " + str(status))
+
+            raise RuntimeError("Unhandled Non-200 response", status)
         if not isinstance(data, list) and "link" in data.keys():
-            return [data.get("link"), True]
+            # keep the whole link object, its expiry drives the link cache
+            return [data, True]
         else:
             return [data, False]
 
-    def _get_resource(self, endpoint, params=None):
-        request_url = self._build_url(endpoint)
-        resource_obj, is_link = self._get_resource_or_link(request_url, params=params)
-        if not is_link:
-            return resource_obj
-        r = self.session.get(resource_obj)
-        r.close()
-        if r.status_code != 200:
-            raise RuntimeError("Unhandled Non-200 response", r)
-        return r.json()
+    async def _get_resource(self, endpoint, params=None, paths=None):
+        """Return a resource, or only the items at ``paths`` for a linked one.
+
+        ``paths`` maps ijson prefixes to optional field filters, see
+        ``decode.select``. Linked documents are then parsed incrementally.
+        """
+        ttl = self.cache.ttl(endpoint)
+        key = self.cache.key(endpoint, params) + paths_key(paths)
+        return await self.cache.get_or_fetch(
+            key, ttl, lambda: self._fetch_resource(endpoint, params, paths, key, ttl)
+        )
+
+    async def _fetch_resource(self, endpoint, params, paths, key, ttl):
+        link_key = ("link",) + key
+        link = self.cache.get(link_key)
+        cached = link is not None
+        while True:
+            if link is None:
+                request_url = self._build_url(endpoint)
+                resource_obj, is_link = await self._get_resource_or_link(
+                    request_url, params=params
+                )
+                if not is_link:
+                    return select(resource_obj, paths) if paths else resource_obj
+                link = resource_obj["link"]
+                self.cache.set(
+                    link_key, link, link_ttl(resource_obj.get("expires"), ttl)
+                )
+            status, _, data = await self._request(
+                link, paths=paths, endpoint=endpoint, link=True
+            )
+            if status == 200:
+                return data
+            self.cache.pop(link_key)
+            if not cached:
+                raise RuntimeError("Unhandled Non-200 response", status)
+            # the cached link may have been revoked early, ask for a new one
+            link, cached = None, False
 
     def _build_url(self, endpoint):
         return self.base_url + endpoint
 
-    def get_member(self, cust_id, include_licenses=True):
+    async def get_member(self, cust_id, include_licenses=True):
         params = {"cust_ids": cust_id, "include_licenses": include_licenses}
-        return self._get_resource("/data/member/get", params=params)
+        return await self._get_resource("/data/member/get", params=params)
 
-    def get_member_career(self, cust_id):
-        params = {"cust_id": cust_id}
-        return self._get_resource("/data/stats/member_career", params=params)
+    async def get_members(self, cust_ids, include_licenses=True):
+        params = {
+            "cust_ids": ",".join(str(cust_id) for cust_id in cust_ids),
+            "include_licenses": include_licenses,
+        }
+        return await self._get_resource("/data/member/get", params=params)
+
+    async def get_league_roster(self, league_id):
+        params = {"league_id": league_id}
+        return await self._get_resource("/data/league/roster", params=params)
 
-    def get_cars(self):
-        return self._get_resource("/data/car/get")
+    async def get_team(self, team_id):
+        params = {"team_id": team_id}
+        return await self._get_resource("/data/team/get", params=params)
 
-    def get_recent_results(self, cust_id):
+    async def get_member_career(self, cust_id):
+        params = {"cust_id": cust_id}
+        return await self._get_resource("/data/stats/member_career", params=params)
+
+    async def get_result(self, subsession_id, paths=None):
+        params = {"subsession_id": subsession_id}
+        return await self._get_resource("/data/results/get", params=params, paths=paths)
+
+    async def get_lap_data(self, subsession_id, cust_id, simsession_number=0):
+        """Return the laps of a driver in a session, all chunks together."""
+        params = {
+            "subsession_id": subsession_id,
+            "simsession_number": simsession_number,
+            "cust_id": cust_id,
+        }
+        lap_data = await self._get_resource("/data/results/lap_data", params=params)
+        chunk_info = lap_data.get("chunk_info") or {}
+        base_url = chunk_info.get("base_download_url", "")
+        # the chunks are public documents, fetched together on the shared session
+        chunks = await asyncio.gather(
+            *(
+                self._get_chunk(base_url + file_name)
+                for file_name in chunk_info.get("chunk_file_names") or []
+            )
+        )
+        return [lap for chunk in chunks for lap in chunk]
+
+    async def _get_chunk(self, url):
+        status, _, data = await self._request(
+            url, endpoint="/data/results/lap_data", link=True
+        )
+        if status != 200:
+            raise RuntimeError("Unhandled Non-200 response", status)
+        return data
+
+    async def get_member_chart_data(self, cust_id, category_id, chart_type):
+        """Return a rating history, chart_type 1 for iRating, 3 for licence/SR."""
+        params = {
+            "cust_id": cust_id,
+            "category_id": category_id,
+            "chart_type": chart_type,
+        }
+        return await self._get_resource("/data/member/chart_data", params=params)
+
+    async def lookup_drivers(self, search_term, league_id=None):
+        params = {"search_term": search_term}
+        if league_id is not None:
+            params["league_id"] = league_id
+        return await self._get_resource(LOOKUP_ENDPOINT, params=params)
+
+    async def get_cars(self):
+        return await self._get_resource("/data/car/get")
+
+    async def get_series_seasons(self, paths=None):
+        return await self._get_resource("/data/series/seasons", paths=paths)
+
+    async def get_tracks(self):
+        return await self._get_resource("/data/track/get")
+
+    async def get_series(self):
+        return await self._get_resource("/data/series/get")
+
+    async def get_recent_results(self, cust_id):
         params = {"cust_id": cust_id}
-        results = self._get_resource("/data/stats/member_recent_races", params=params)
-        for i, v in enumerate(results["races"]):
-            results["races"][i]["car_name"] = self.car_names[v["car_id"]]
+        results = await self._get_resource(
+            "/data/stats/member_recent_races", params=params
+        )
+        await self._add_assets(results["races"], "cars", "car_id")
         return results
 
 
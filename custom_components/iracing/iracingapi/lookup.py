@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+
+LOOKUP_ENDPOINT = "/data/lookup/drivers"
+LOOKUP_TTL = 3600
+# shorter search terms match too many drivers to be useful
+MIN_SEARCH_LENGTH = 3
+# a result shorter than this is taken as every match of its search term
+LOOKUP_COMPLETE_BELOW = 100
+# search terms kept in memory
+LOOKUP_CACHE_SIZE = 256
+
+
+def normalize(term):
+    return " ".join(term.casefold().split())
+
+
+class DriverLookup:
+    """Driver search by name, answered locally when possible.
+
+    The results are indexed by search term. A term also covers the longer
+    terms starting with it, so typing more of a name filters the result
+    already received instead of calling the API again, as long as that
+    result held every match.
+    """
+
+    def __init__(self, client, ttl=LOOKUP_TTL, maxsize=LOOKUP_CACHE_SIZE):
+        self._client = client
+        self._ttl = ttl
+        self._maxsize = maxsize
+        # normalized term: (monotonic fetch time, drivers)
+        self._terms = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, term):
+        """Return the drivers matching term from the longest cached prefix."""
+        now = time.monotonic()
+        for end in range(len(term), MIN_SEARCH_LENGTH - 1, -1):
+            prefix = term[:end]
+            entry = self._terms.get(prefix)
+            if entry is None:
+                continue
+            fetched, drivers = entry
+            if now - fetched > self._ttl:
+                del self._terms[prefix]
+                continue
+            if end == len(term):
+                self._terms.move_to_end(prefix)
+                return drivers
+            if len(drivers) < LOOKUP_COMPLETE_BELOW:
+                self._terms.move_to_end(prefix)
+                return [
+                    driver
+                    for driver in drivers
+                    if term in normalize(driver["display_name"])
+                ]
+        return None
+
+    async def async_search(self, term):
+        """Return the drivers whose name matches term, as listed by the API."""
+        term = normalize(term)
+        if len(term) < MIN_SEARCH_LENGTH:
+            return []
+        drivers = self._lookup(term)
+        if drivers is not None:
+            self.hits += 1
+            return drivers
+
+        self.misses += 1
+        drivers = [
+            {"cust_id": driver["cust_id"], "display_name": driver["display_name"]}
+            for driver in await self._client.lookup_drivers(term)
+        ]
+        self._terms[term] = (time.monotonic(), drivers)
+        self._terms.move_to_end(term)
+        while len(self._terms) > self._maxsize:
+            self._terms.popitem(last=False)
+        return drivers
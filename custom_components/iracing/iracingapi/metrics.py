@@ -0,0 +1,126 @@
+import time
+from bisect import bisect_left
+
+# upper bounds in milliseconds of the latency histogram buckets
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class EndpointMetrics:
+    """Counters of one Data API endpoint."""
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "bytes",
+        "time",
+        "buckets",
+        "link_requests",
+        "link_bytes",
+        "link_time",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.time = 0.0
+        # one count per bucket of LATENCY_BUCKETS, then the overflow
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.link_requests = 0
+        self.link_bytes = 0
+        self.link_time = 0.0
+
+    def as_dict(self):
+        histogram = {
+            f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+        }
+        histogram["inf"] = self.buckets[-1]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "latency_avg_ms": _average_ms(self.time, self.requests),
+            "latency_histogram_ms": histogram,
+            "link_requests": self.link_requests,
+            "link_bytes": self.link_bytes,
+            "link_latency_avg_ms": _average_ms(self.link_time, self.link_requests),
+        }
+
+
+def _average_ms(total, count):
+    return round(total / count * 1000, 1) if count else None
+
+
+class ClientMetrics:
+    """Request and rate-limit telemetry of an irDataClient."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.endpoints = {}
+        self.reauths = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.ratelimit_limit = None
+        self.ratelimit_remaining = None
+        self.ratelimit_reset = None
+
+    def record(self, endpoint, status, elapsed, size, link=False):
+        """Record a request to an endpoint, or to the document it linked to."""
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        if link:
+            metrics.link_requests += 1
+            metrics.link_bytes += size
+            metrics.link_time += elapsed
+        else:
+            metrics.requests += 1
+            metrics.bytes += size
+            metrics.time += elapsed
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, elapsed * 1000)] += 1
+        if status != 200:
+            metrics.errors += 1
+
+    def update_ratelimit(self, headers):
+        """Keep the quota reported by the last response."""
+        try:
+            self.ratelimit_limit = int(headers["x-ratelimit-limit"])
+            self.ratelimit_remaining = int(headers["x-ratelimit-remaining"])
+            self.ratelimit_reset = int(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            pass
+
+    @property
+    def requests(self):
+        return sum(m.requests + m.link_requests for m in self.endpoints.values())
+
+    @property
+    def bytes(self):
+        return sum(m.bytes + m.link_bytes for m in self.endpoints.values())
+
+    @property
+    def latency_avg_ms(self):
+        """Average time of an endpoint call, link resolution included."""
+        count = sum(m.requests for m in self.endpoints.values())
+        total = sum(m.time + m.link_time for m in self.endpoints.values())
+        return _average_ms(total, count)
+
+    def as_dict(self):
+        return {
+            "since": self.started,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "latency_avg_ms": self.latency_avg_ms,
+            "reauths": self.reauths,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "ratelimit": {
+                "limit": self.ratelimit_limit,
+                "remaining": self.ratelimit_remaining,
+                "reset": self.ratelimit_reset,
+            },
+            "endpoints": {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in sorted(self.endpoints.items())
+            },
+        }
@@ -0,0 +1,169 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# below this share of the quota, background requests are paced
+RATELIMIT_PACING_THRESHOLD = 0.25
+# wait applied after a 429 without a usable x-ratelimit-reset header
+RATELIMIT_DEFAULT_WAIT = 60
+
+_priority = contextvars.ContextVar(
+    "iracing_request_priority", default=PRIORITY_BACKGROUND
+)
+
+
+@contextlib.contextmanager
+def request_priority(priority):
+    """Run the requests issued in this context with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PrioritySemaphore:
+    """Semaphore handing its free slots to the waiter of highest priority.
+
+    Waiters of the same priority are served in arrival order, so an
+    interactive request skips the queued background ones.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority=None):
+        if priority is None:
+            priority = _priority.get()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just before the cancellation
+                self.release()
+            raise
+        return True
+
+    def release(self):
+        self._value += 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._value > 0:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._value -= 1
+                future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class RateLimiter:
+    """Token bucket fed by the x-ratelimit-* headers of the Data API.
+
+    Requests wait in a priority queue instead of sleeping: once the remaining
+    quota drops under the pacing threshold, background requests are spread
+    evenly over what is left of the window, and nothing goes out once it is
+    exhausted until the reset time.
+    """
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self._last_sent = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = None
+
+    async def acquire(self, priority=None):
+        if priority is None:
+            priority = _priority.get()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        await future
+
+    def update(self, headers):
+        """Record the quota reported by a Data API response."""
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = int(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        if self.reset is None or reset != self.reset:
+            # new window
+            self.remaining = remaining
+        else:
+            # responses may come back out of order, keep the lowest count
+            self.remaining = min(self.remaining, remaining)
+        self.limit = limit
+        self.reset = reset
+        self._dispatch()
+
+    def exhausted(self, headers):
+        """Block every request until the window resets after a 429."""
+        try:
+            self.reset = int(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            self.reset = int(time.time()) + RATELIMIT_DEFAULT_WAIT
+        self.remaining = 0
+        self._dispatch()
+
+    def _delay(self, priority):
+        now = time.time()
+        if self.reset is not None and now >= self.reset:
+            # window rolled over, the bucket is full again until told otherwise
+            self.remaining = self.limit
+            self.reset = None
+        if self.remaining is None:
+            return 0
+        if self.remaining <= 0:
+            return self.reset - now if self.reset is not None else 0
+        if (
+            priority <= PRIORITY_INTERACTIVE
+            or self.reset is None
+            or self.limit is None
+            or self.remaining > self.limit * RATELIMIT_PACING_THRESHOLD
+        ):
+            return 0
+        interval = (self.reset - now) / self.remaining
+        return max(self._last_sent + interval - now, 0)
+
+    def _dispatch(self):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                # cancelled waiter
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay(priority)
+            if delay > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(
+                    delay, self._dispatch
+                )
+                return
+            heapq.heappop(self._waiters)
+            if self.remaining is not None:
+                self.remaining -= 1
+            self._last_sent = time.time()
+            future.set_result(None)
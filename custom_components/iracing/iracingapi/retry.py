@@ -0,0 +1,119 @@
+import random
+import time
+
+import aiohttp
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+LOGIN_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+# answers of an API that is down or overloaded, worth another attempt
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """Attempts, backoff and timeouts applied to every Data API request.
+
+    The delay before attempt ``n + 1`` is drawn uniformly between 0 and
+    ``base_delay * 2 ** n`` capped at ``max_delay`` ("full jitter"), so
+    clients failing together do not retry together.
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        base_delay=1.0,
+        max_delay=30.0,
+        max_rate_limited=3,
+        timeout=DEFAULT_TIMEOUT,
+        login_timeout=LOGIN_TIMEOUT,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # 429 answers tolerated for one call, each waits for the window reset
+        self.max_rate_limited = max_rate_limited
+        self.timeout = timeout
+        self.login_timeout = login_timeout
+
+    def delay(self, attempt):
+        """Return the wait after the given failed attempt, counted from 0."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def retryable(status):
+        return status in RETRY_STATUSES
+
+
+class CircuitBreaker:
+    """Stop sending requests to an API that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast. Once ``reset_timeout`` has passed, a single probe
+    request is let through: its success closes the circuit, its failure
+    opens it again for twice as long, up to ``max_reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, max_reset_timeout=600):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def retry_in(self):
+        """Seconds before the next probe, 0 when requests are let through."""
+        if self.state != self.OPEN:
+            return 0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def allow(self):
+        """Return whether a request may be sent now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in == 0:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self._probing = False
+
+    def abandon(self):
+        """Forget a request that ended without an answer, e.g. cancelled."""
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # the probe failed, back off further
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probing = False
+
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in, 1),
+        }
@@ -0,0 +1,209 @@
+import asyncio
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+SCHEDULE_TTL = 24 * 3600
+# minimum delay between two refreshes triggered by a season without a future
+SCHEDULE_MISS_REFRESH_INTERVAL = 3600
+# only the race weeks are parsed, each one names its series and season
+SCHEDULE_PATH = "item.schedules.item"
+DESCRIPTOR_FIELDS = (
+    "repeating",
+    "first_session_time",
+    "repeat_minutes",
+    "day_offset",
+    "session_times",
+    "start_date",
+)
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+
+def _timestamp(value):
+    """Return the UTC timestamp of an API date or date-time."""
+    if len(value) == 10:
+        value += "T00:00:00"
+    when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def session_times(descriptor, week_start, week_end):
+    """Return the session start timestamps of a race time descriptor in a week."""
+    if not descriptor.get("repeating"):
+        return [
+            start
+            for value in descriptor.get("session_times") or []
+            if week_start <= (start := _timestamp(value)) < week_end
+        ]
+    hours, minutes, seconds = (
+        int(part) for part in descriptor["first_session_time"].split(":")
+    )
+    first = hours * 3600 + minutes * 60 + seconds
+    repeat = (descriptor.get("repeat_minutes") or 0) * 60
+    start_date = (
+        _timestamp(descriptor["start_date"])
+        if descriptor.get("start_date")
+        else week_start
+    )
+    times = []
+    for offset in descriptor.get("day_offset") or range(7):
+        day = start_date + offset * DAY
+        start = day + first
+        while start < min(day + DAY, week_end):
+            if start >= week_start:
+                times.append(start)
+            if not repeat:
+                break
+            start += repeat
+    return times
+
+
+def _week(schedule):
+    track = schedule.get("track") or {}
+    return {
+        "season_id": schedule.get("season_id"),
+        "season_name": schedule.get("season_name"),
+        "race_week_num": schedule.get("race_week_num"),
+        "start": _timestamp(schedule["start_date"]),
+        "end": (
+            _timestamp(schedule["week_end_time"])
+            if schedule.get("week_end_time")
+            else None
+        ),
+        "track_name": track.get("track_name"),
+        "config_name": track.get("config_name"),
+        "descriptors": [
+            {field: descriptor.get(field) for field in DESCRIPTOR_FIELDS}
+            for descriptor in schedule.get("race_time_descriptors") or []
+        ],
+    }
+
+
+class SeriesSchedule:
+    """Race weeks and sessions of a series, indexed by time.
+
+    Week boundaries and session start times are sorted once, so the week or
+    the next session at a given time is a binary search.
+    """
+
+    __slots__ = ("series_id", "series_name", "_starts", "_ends", "_weeks", "_sessions")
+
+    def __init__(self, series_id, series):
+        self.series_id = series_id
+        self.series_name = series.get("series_name")
+        weeks = series["weeks"]
+        self._weeks = weeks
+        self._starts = [week["start"] for week in weeks]
+        self._ends = [week["end"] for week in weeks]
+        sessions = set()
+        for week in weeks:
+            for descriptor in week["descriptors"]:
+                sessions.update(session_times(descriptor, week["start"], week["end"]))
+        self._sessions = sorted(sessions)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def week_at(self, at):
+        """Return the race week running at a timestamp, if any."""
+        position = bisect_right(self._starts, at) - 1
+        if position < 0 or at >= self._ends[position]:
+            return None
+        return self._weeks[position]
+
+    def next_session(self, at):
+        """Return the start timestamp of the first session after a timestamp."""
+        position = bisect_right(self._sessions, at)
+        if position == len(self._sessions):
+            return None
+        return self._sessions[position]
+
+    def next_change(self, at):
+        """Return when the next session or race week starts after a timestamp."""
+        changes = [self.next_session(at)]
+        position = bisect_right(self._starts, at)
+        if position < len(self._starts):
+            changes.append(self._starts[position])
+        if (week := self.week_at(at)) is not None:
+            changes.append(week["end"])
+        changes = [change for change in changes if change is not None]
+        return min(changes) if changes else None
+
+
+class ScheduleCache:
+    """Season schedules of every series, persisted and refreshed once a day.
+
+    Only the race weeks are kept. The time index of a series is built the
+    first time it is asked for and kept until the next download.
+    """
+
+    def __init__(self, client, store=None, ttl=SCHEDULE_TTL):
+        self._client = client
+        self._store = store
+        self._ttl = ttl
+        self._data = None
+        self._indexes = {}
+        self._miss_refreshed = 0
+        self._lock = asyncio.Lock()
+
+    async def async_get(self, series_id, at=None):
+        """Return the schedule of a series, None when it has no season."""
+        series_id = str(series_id)
+        at = time.time() if at is None else at
+        async with self._lock:
+            if self._data is None:
+                self._data = (
+                    await self._store.async_load() if self._store else None
+                ) or {}
+
+            if not self._data:
+                await self._async_refresh()
+            elif time.time() - self._data["fetched"] > self._ttl or (
+                # the known seasons are over, the next one may be published
+                at >= self._end(series_id)
+                and time.time() - self._miss_refreshed > SCHEDULE_MISS_REFRESH_INTERVAL
+            ):
+                if at >= self._end(series_id):
+                    self._miss_refreshed = time.time()
+                try:
+                    await self._async_refresh()
+                except Exception as err:  # pylint: disable=broad-except
+                    # a stale schedule is better than failing the caller
+                    self._client.log_error(f"Unable to refresh schedules: {err}")
+
+            series = self._data["series"].get(series_id)
+            if series is None:
+                return None
+            schedule = self._indexes.get(series_id)
+            if schedule is None:
+                schedule = self._indexes[series_id] = SeriesSchedule(series_id, series)
+            return schedule
+
+    def _end(self, series_id):
+        series = self._data["series"].get(series_id)
+        return series["weeks"][-1]["end"] if series and series["weeks"] else 0
+
+    async def _async_refresh(self):
+        selected = await self._client.get_series_seasons(paths={SCHEDULE_PATH: None})
+        series = {}
+        for schedule in selected[SCHEDULE_PATH]:
+            entry = series.setdefault(
+                str(schedule["series_id"]),
+                {"series_name": schedule.get("series_name"), "weeks": []},
+            )
+            entry["weeks"].append(_week(schedule))
+        for entry in series.values():
+            weeks = entry["weeks"]
+            weeks.sort(key=lambda week: week["start"])
+            for week, following in zip(weeks, weeks[1:] + [None]):
+                if week["end"] is None:
+                    week["end"] = (
+                        following["start"] if following else week["start"] + WEEK
+                    )
+        self._data = {"fetched": time.time(), "series": series}
+        self._indexes = {}
+        if self._store:
+            await self._store.async_save(self._data)
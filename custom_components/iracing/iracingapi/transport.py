@@ -0,0 +1,229 @@
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .decode import loads
+
+ARCHIVE_VERSION = 1
+# the login answer carries the session tokens and the email, it is replaced
+AUTH_PATH = "/auth"
+AUTH_PLACEHOLDER = b'{"authcode": "replay"}'
+# response headers kept in an archive, the auth cookies are left out
+RECORDED_HEADERS = (
+    "content-type",
+    "x-ratelimit-limit",
+    "x-ratelimit-remaining",
+    "x-ratelimit-reset",
+)
+
+
+def exchange_key(method, url, params=None):
+    """Return what identifies a request: method, URL and sorted query."""
+    url = URL(url)
+    if params:
+        url = url.update_query(params)
+    return f"{method} {url.with_query(sorted(url.query.items()))}"
+
+
+def write_archive(path, exchanges, metadata=None):
+    """Write exchanges as gzip-compressed JSON lines, after a metadata line."""
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        file.write(json.dumps({"version": ARCHIVE_VERSION, **(metadata or {})}))
+        file.write("\n")
+        for exchange in exchanges:
+            body = exchange.get("body")
+            line = dict(exchange)
+            if body is not None:
+                try:
+                    line["body"] = body.decode("utf-8")
+                except UnicodeDecodeError:
+                    line["body"] = base64.b64encode(body).decode("ascii")
+                    line["base64"] = True
+            file.write(json.dumps(line, separators=(",", ":")))
+            file.write("\n")
+
+
+def read_archive(path):
+    """Return the metadata and the exchanges of an archive."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        metadata = json.loads(file.readline())
+        if metadata.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version: {metadata.get('version')}")
+        exchanges = []
+        for line in file:
+            exchange = json.loads(line)
+            body = exchange.get("body")
+            if body is not None:
+                exchange["body"] = (
+                    base64.b64decode(body)
+                    if exchange.pop("base64", False)
+                    else body.encode("utf-8")
+                )
+            exchanges.append(exchange)
+    return metadata, exchanges
+
+
+class RecordedContent:
+    """Body of a recorded response, read like an aiohttp stream."""
+
+    def __init__(self, body):
+        self._body = body
+        self._position = 0
+        self.total_bytes = len(body)
+
+    async def read(self, n=-1):
+        end = len(self._body) if n < 0 else self._position + n
+        chunk = self._body[self._position : end]
+        self._position += len(chunk)
+        return chunk
+
+
+class RecordedResponse:
+    """Response built from recorded bytes, with what irDataClient reads."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.content = RecordedContent(body)
+        self._body = body
+
+    async def read(self):
+        return await self.content.read()
+
+    async def json(self, content_type=None):
+        return loads(self._body)
+
+
+class _Exchange:
+    """Context manager returned by the get and post of the sessions below."""
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+
+    async def __aenter__(self):
+        return await self._fetch()
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+class RecordingSession:
+    """Wrap an aiohttp session and keep every exchange for a replay.
+
+    The whole body is read before it is handed to the client, linked
+    documents included. Failed requests are kept too and fail again on
+    replay. Only a placeholder is kept of the login answer, so an archive
+    holds no credentials nor session token.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self.cookie_jar = session.cookie_jar
+        self.exchanges = []
+        self._started = time.monotonic()
+
+    def get(self, url, **kwargs):
+        return _Exchange(lambda: self._record("GET", url, kwargs))
+
+    def post(self, url, **kwargs):
+        return _Exchange(lambda: self._record("POST", url, kwargs))
+
+    async def close(self):
+        await self._session.close()
+
+    def save(self, path, **metadata):
+        """Write the archive, a blocking call."""
+        write_archive(path, self.exchanges, metadata)
+
+    async def _record(self, method, url, kwargs):
+        start = time.monotonic()
+        exchange = {
+            "key": exchange_key(method, url, kwargs.get("params")),
+            "at": round(start - self._started, 4),
+        }
+        try:
+            async with self._session.request(method, url, **kwargs) as response:
+                body = await response.read()
+                exchange["status"] = response.status
+                exchange["headers"] = {
+                    name: response.headers[name]
+                    for name in RECORDED_HEADERS
+                    if name in response.headers
+                }
+                exchange["body"] = (
+                    AUTH_PLACEHOLDER if URL(url).path == AUTH_PATH else body
+                )
+        except asyncio.TimeoutError:
+            exchange["error"] = "timeout"
+            raise
+        except aiohttp.ClientError as err:
+            exchange["error"] = str(err) or type(err).__name__
+            raise
+        finally:
+            exchange["elapsed"] = round(time.monotonic() - start, 4)
+            self.exchanges.append(exchange)
+        return RecordedResponse(exchange["status"], exchange["headers"], body)
+
+
+class ReplaySession:
+    """Answer the client from recorded exchanges instead of the network.
+
+    A request gets the next exchange recorded for its method, URL and
+    query, the last one again once they are used up. The exchange starts at
+    its recorded offset from the first one and answers after its recorded
+    latency, both divided by ``speed``: requests sent sooner than recorded
+    wait for their time. Everything is answered at once when ``speed`` is 0.
+    """
+
+    def __init__(self, exchanges, speed=1.0):
+        self.speed = speed
+        # the recorded answers do not depend on cookies
+        self.cookie_jar = aiohttp.DummyCookieJar()
+        self.missed = 0
+        # monotonic time the recording started at, scaled by speed
+        self._origin = None
+        self._exchanges = defaultdict(deque)
+        for exchange in exchanges:
+            self._exchanges[exchange["key"]].append(exchange)
+
+    @classmethod
+    def from_archive(cls, path, speed=1.0):
+        """Load an archive, a blocking call."""
+        _, exchanges = read_archive(path)
+        return cls(exchanges, speed)
+
+    def get(self, url, params=None, **kwargs):
+        return _Exchange(lambda: self._replay("GET", url, params))
+
+    def post(self, url, params=None, **kwargs):
+        return _Exchange(lambda: self._replay("POST", url, params))
+
+    async def close(self):
+        pass
+
+    async def _replay(self, method, url, params):
+        queue = self._exchanges.get(exchange_key(method, url, params))
+        if not queue:
+            self.missed += 1
+            raise aiohttp.ClientConnectionError(f"Not recorded: {method} {url}")
+        exchange = queue.popleft() if len(queue) > 1 else queue[0]
+        if self.speed:
+            now = time.monotonic()
+            if self._origin is None:
+                self._origin = now - exchange["at"] / self.speed
+            delay = max(self._origin + exchange["at"] / self.speed - now, 0)
+            await asyncio.sleep(delay + exchange["elapsed"] / self.speed)
+        if exchange.get("error") == "timeout":
+            raise asyncio.TimeoutError
+        if "error" in exchange:
+            raise aiohttp.ClientConnectionError(exchange["error"])
+        return RecordedResponse(
+            exchange["status"], exchange["headers"], exchange["body"]
+        )
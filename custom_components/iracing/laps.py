@@ -0,0 +1,53 @@
+"""Lap time statistics of the latest race for the iRacing integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+# lap_data times are in ten-thousandths of a second
+LAP_TIME_UNIT = 10_000
+# lap event of the laps whose time does not count
+INVALID_LAP_EVENT = "invalid"
+
+
+def lap_statistics(subsession_id: int, laps: list[dict[str, Any]]) -> dict[str, Any]:
+    """Return the lap time figures of a race, computed on arrays of its laps.
+
+    A lap is valid when it has a time that counts, and clean when it is
+    also free of incidents and events such as a pit stop. The median and the deviation
+    only use the clean laps, when there are some.
+    """
+    # the columns are filled in a single pass over the lap dicts
+    times, incidents, events, invalid = [], [], [], []
+    for lap in laps:
+        lap_events = lap.get("lap_events") or ()
+        times.append(lap.get("lap_time") or -1)
+        incidents.append(bool(lap.get("incident")))
+        events.append(bool(lap_events))
+        invalid.append(INVALID_LAP_EVENT in lap_events)
+    times = np.array(times, dtype=np.int64)
+    valid = (times > 0) & ~np.array(invalid, dtype=bool)
+    clean = valid & ~np.array(incidents, dtype=bool) & ~np.array(events, dtype=bool)
+    statistics: dict[str, Any] = {
+        "subsession_id": subsession_id,
+        "laps": int(valid.sum()),
+        "clean_laps": int(clean.sum()),
+        "best_lap": None,
+        "median_lap": None,
+        "lap_time_std": None,
+        "clean_lap_ratio": None,
+    }
+    if not valid.any():
+        return statistics
+
+    sample = times[clean] if clean.any() else times[valid]
+    seconds = sample / LAP_TIME_UNIT
+    statistics.update(
+        best_lap=round(float(times[valid].min()) / LAP_TIME_UNIT, 3),
+        median_lap=round(float(np.median(seconds)), 3),
+        lap_time_std=round(float(seconds.std()), 3),
+        clean_lap_ratio=round(float(clean.sum() / valid.sum()) * 100, 1),
+    )
+    return statistics
@@ -0,0 +1,173 @@
+"""Parsed data model for the iRacing integration."""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+# category_id: key prefix of the sensors, in the order the sensors are created
+CATEGORIES: dict[int, str] = {
+    5: "sports_car",
+    6: "formula_car",
+    4: "dirt_road",
+    1: "oval",
+    3: "dirt_oval",
+}
+
+# metric key: CategoryStats attribute
+METRICS: dict[str, str] = {
+    "licence_ir": "irating",
+    "licence_sr": "safety_rating",
+    "starts": "starts",
+    "laps": "laps",
+    "wins": "wins",
+    "top5": "top5",
+}
+
+
+class CategoryStats:
+    """Licence and career figures of a driver in one category."""
+
+    __slots__ = ("irating", "safety_rating", "starts", "laps", "wins", "top5")
+
+    def __init__(self) -> None:
+        """Initialize with unknown values."""
+        self.irating: int | None = None
+        self.safety_rating: float | None = None
+        self.starts: int | None = None
+        self.laps: int | None = None
+        self.wins: int | None = None
+        self.top5: int | None = None
+
+    def astuple(self) -> tuple:
+        """Return the values in slot order."""
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+
+class DriverSnapshot:
+    """Everything the sensors of a driver display, built from one refresh."""
+
+    __slots__ = (
+        "cust_id",
+        "name",
+        "categories",
+        "recent_results",
+        "next_race",
+        "current_week",
+        "latest_race",
+        "latest_laps",
+    )
+
+    def __init__(self, cust_id: str) -> None:
+        """Initialize an empty snapshot."""
+        self.cust_id = cust_id
+        self.name: str | None = None
+        self.categories: dict[int, CategoryStats] = {
+            category_id: CategoryStats() for category_id in CATEGORIES
+        }
+        self.recent_results: list[dict[str, Any]] = []
+        # schedule of the favourite series
+        self.next_race: dict[str, Any] | None = None
+        self.current_week: dict[str, Any] | None = None
+        # full results of the last race
+        self.latest_race: dict[str, Any] | None = None
+        self.latest_laps: dict[str, Any] | None = None
+
+    @classmethod
+    def from_api(
+        cls,
+        cust_id: str,
+        member: dict[str, Any],
+        career: dict[str, Any],
+        recent_results: list[dict[str, Any]],
+    ) -> DriverSnapshot:
+        """Build a snapshot from the member/get and member_career payloads."""
+        snapshot = cls(cust_id)
+        snapshot.name = member["display_name"]
+        categories = snapshot.categories
+        for licence in member["licenses"]:
+            if stats := categories.get(licence["category_id"]):
+                stats.irating = licence.get("irating")
+                stats.safety_rating = licence["safety_rating"]
+        for career_stats in career["stats"]:
+            if stats := categories.get(career_stats["category_id"]):
+                stats.starts = career_stats["starts"]
+                stats.laps = career_stats["laps"]
+                stats.wins = career_stats["wins"]
+                stats.top5 = career_stats["top5"]
+        snapshot.recent_results = recent_results
+        return snapshot
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> DriverSnapshot:
+        """Build a snapshot back from the values of ``as_dict``."""
+        snapshot = cls(values["cust_id"])
+        snapshot.name = values.get("name")
+        snapshot.recent_results = values.get("recent_results") or []
+        snapshot.next_race = values.get("next_race")
+        snapshot.current_week = values.get("current_week")
+        snapshot.latest_race = values.get("latest_race")
+        snapshot.latest_laps = values.get("latest_laps")
+        for category_id, prefix in CATEGORIES.items():
+            stats = snapshot.categories[category_id]
+            for metric, attribute in METRICS.items():
+                setattr(stats, attribute, values.get(f"{prefix}_{metric}"))
+        return snapshot
+
+    def value(self, category_id: int, attribute: str) -> Any:
+        """Return a figure of a category."""
+        return getattr(self.categories[category_id], attribute)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the values keyed like the sensors."""
+        values: dict[str, Any] = {
+            "cust_id": self.cust_id,
+            "name": self.name,
+            "recent_results": self.recent_results,
+            "next_race": self.next_race,
+            "current_week": self.current_week,
+            "latest_race": self.latest_race,
+            "latest_laps": self.latest_laps,
+        }
+        for category_id, prefix in CATEGORIES.items():
+            stats = self.categories[category_id]
+            for metric, attribute in METRICS.items():
+                values[f"{prefix}_{metric}"] = getattr(stats, attribute)
+        return values
+
+    def changed_keys(self, previous: DriverSnapshot | None) -> set[str]:
+        """Return the keys whose value differs from a previous snapshot."""
+        current = self.as_dict()
+        if previous is None:
+            return set(current)
+        before = previous.as_dict()
+        return {key for key, value in current.items() if before.get(key) != value}
+
+    def memory_usage(self) -> int:
+        """Return the approximate size in bytes of the snapshot."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.categories)
+        size += sum(sys.getsizeof(stats) for stats in self.categories.values())
+        size += sys.getsizeof(self.recent_results)
+        for race in self.recent_results:
+            size += sys.getsizeof(race) + sum(
+                sys.getsizeof(value) for value in race.values()
+            )
+        return size
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the values of two snapshots."""
+        if not isinstance(other, DriverSnapshot):
+            return NotImplemented
+        return (
+            self.cust_id == other.cust_id
+            and self.name == other.name
+            and self.recent_results == other.recent_results
+            and self.next_race == other.next_race
+            and self.current_week == other.current_week
+            and self.latest_race == other.latest_race
+            and self.latest_laps == other.latest_laps
+            and all(
+                stats.astuple() == other.categories[category_id].astuple()
+                for category_id, stats in self.categories.items()
+            )
+        )
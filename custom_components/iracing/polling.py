@@ -0,0 +1,91 @@
+"""Adaptive refresh interval for the iRacing integration."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# a driver who started a race this recently is likely still racing
+ACTIVE_WINDOW = timedelta(hours=3)
+# time after a usual start time where a race is likely to finish
+RACE_WINDOW = timedelta(hours=2)
+# past races older than this do not define usual start times anymore
+HABIT_MAX_AGE = timedelta(days=28)
+
+
+class AdaptivePolling:
+    """Pick the next refresh interval from the driver's recent races.
+
+    The interval drops to ``min_interval`` while the driver is racing or
+    around the times of day they usually race, and doubles from
+    ``base_interval`` up to ``max_interval`` on each poll without a new race.
+    """
+
+    def __init__(
+        self,
+        min_interval: timedelta,
+        base_interval: timedelta,
+        max_interval: timedelta,
+    ) -> None:
+        """Initialize the polling policy."""
+        self.min_interval = min_interval
+        self.base_interval = max(base_interval, min_interval)
+        self.max_interval = max(max_interval, self.base_interval)
+        self.idle_polls = 0
+        self._last_subsession_id: int | None = None
+
+    def next_interval(
+        self, races: list[dict[str, Any]], now: datetime | None = None
+    ) -> timedelta:
+        """Return the delay until the next refresh."""
+        now = now or dt_util.utcnow()
+        starts = sorted(
+            (
+                start
+                for race in races
+                if (start := dt_util.parse_datetime(race.get("session_start_time", "")))
+            ),
+            reverse=True,
+        )
+
+        latest = max((race.get("subsession_id", 0) for race in races), default=None)
+        if latest != self._last_subsession_id:
+            self._last_subsession_id = latest
+            self.idle_polls = 0
+        else:
+            self.idle_polls += 1
+
+        if starts and now - starts[0] < ACTIVE_WINDOW:
+            return self.min_interval
+
+        habits = [start for start in starts if now - start < HABIT_MAX_AGE]
+        until_window = self._until_next_window(habits, now)
+        if until_window == timedelta(0):
+            return self.min_interval
+
+        interval = min(
+            self.base_interval * 2 ** min(self.idle_polls, 16), self.max_interval
+        )
+        if until_window is not None:
+            # wake up in time for the next usual race, not after it
+            interval = min(interval, max(until_window, self.min_interval))
+        return interval
+
+    @staticmethod
+    def _until_next_window(starts: list[datetime], now: datetime) -> timedelta | None:
+        """Return the delay until the next usual race window, 0 if inside one."""
+        if not starts:
+            return None
+        day = timedelta(days=1)
+        best: timedelta | None = None
+        for start in starts:
+            # same time of day as the past race, on the last occurrence before now
+            window_start = start + (now - start) // day * day
+            if now - window_start < RACE_WINDOW:
+                return timedelta(0)
+            delay = window_start + day - now
+            if best is None or delay < best:
+                best = delay
+        return best
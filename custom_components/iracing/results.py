@@ -0,0 +1,244 @@
+"""Full subsession results of the latest races for the iRacing integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from functools import partial
+import gzip
+import logging
+import os
+import shutil
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_bytes
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# total size of the compressed results kept on disk
+RESULTS_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+# prefixes of results/get selected from the document
+RACE = "session_results.item"
+SPLITS = "session_splits.item"
+CLASSES = "car_classes.item"
+STRENGTH_OF_FIELD = "event_strength_of_field"
+
+ROW_FIELDS = (
+    "cust_id",
+    "display_name",
+    "car_class_id",
+    "starting_position",
+    "finish_position",
+    "finish_position_in_class",
+    "laps_complete",
+    "incidents",
+    "oldi_rating",
+    "newi_rating",
+    "reason_out",
+)
+
+
+def summarize(
+    subsession_id: int, selected: dict[str, list], cust_ids: frozenset[str]
+) -> dict[str, Any]:
+    """Return the aggregates of a subsession and the race row of each driver."""
+    splits = [split["subsession_id"] for split in selected[SPLITS]]
+    classes = {
+        str(car_class["car_class_id"]): {
+            "name": car_class.get("short_name") or car_class.get("name"),
+            "strength_of_field": car_class.get("strength_of_field"),
+            "entries": car_class.get("num_entries"),
+        }
+        for car_class in selected[CLASSES]
+    }
+    drivers = {}
+    # only the race session is selected, the rows of a team are its drivers'
+    for session in selected[RACE]:
+        for row in session.get("results") or ():
+            for driver in (row, *(row.get("driver_results") or ())):
+                if str(driver.get("cust_id")) in cust_ids:
+                    drivers[str(driver["cust_id"])] = {
+                        field: driver.get(field) for field in ROW_FIELDS
+                    }
+    sof = selected[STRENGTH_OF_FIELD]
+    return {
+        "subsession_id": subsession_id,
+        "strength_of_field": sof[0] if sof else None,
+        "split": splits.index(subsession_id) + 1 if subsession_id in splits else None,
+        "splits": len(splits) or None,
+        "field_size": (
+            sum(car_class["entries"] or 0 for car_class in classes.values())
+            if classes
+            else None
+        ),
+        "classes": classes,
+        "drivers": drivers,
+    }
+
+
+def latest_race(summary: dict[str, Any], cust_id) -> dict[str, Any] | None:
+    """Return the figures of a driver in a summarized subsession."""
+    row = summary["drivers"].get(str(cust_id))
+    if row is None:
+        return None
+    car_class = summary["classes"].get(str(row["car_class_id"]), {})
+    old, new = row["oldi_rating"], row["newi_rating"]
+    in_class = row["finish_position_in_class"]
+    return {
+        "subsession_id": summary["subsession_id"],
+        "strength_of_field": summary["strength_of_field"],
+        "split": summary["split"],
+        "splits": summary["splits"],
+        "field_size": summary["field_size"],
+        "car_class": car_class.get("name"),
+        "class_strength_of_field": car_class.get("strength_of_field"),
+        "class_size": car_class.get("entries"),
+        # positions are counted from 0 in results/get
+        "class_position": in_class + 1 if in_class is not None else None,
+        "finish_position": (
+            row["finish_position"] + 1 if row["finish_position"] is not None else None
+        ),
+        "incidents": row["incidents"],
+        # -1 when the session does not count for iRating
+        "irating_change": (
+            new - old
+            if old is not None and new is not None and min(old, new) >= 0
+            else None
+        ),
+    }
+
+
+def results_path(hass: HomeAssistant) -> str:
+    """Return the directory of the cached summaries."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.results")
+
+
+async def async_remove_results(hass: HomeAssistant) -> None:
+    """Remove the cached summaries from disk."""
+    await hass.async_add_executor_job(
+        partial(shutil.rmtree, results_path(hass), ignore_errors=True)
+    )
+
+
+class SubsessionResults:
+    """Summaries of subsessions, gzip-compressed on disk in an LRU.
+
+    A subsession never changes once its results are published: it is
+    downloaded once for all the monitored drivers, then read from disk.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api, max_bytes: int = RESULTS_CACHE_MAX_BYTES
+    ) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.api = api
+        self.max_bytes = max_bytes
+        self.path = results_path(hass)
+        # subsession id: file size, least recently used first
+        self._index: OrderedDict[int, int] | None = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index) if self._index else 0
+
+    @property
+    def size(self) -> int:
+        """Return the bytes used on disk."""
+        return sum(self._index.values()) if self._index else 0
+
+    async def async_get(self, subsession_id: int, cust_ids) -> dict[str, Any]:
+        """Return the summary of a subsession with the rows of the given drivers."""
+        cust_ids = frozenset(str(cust_id) for cust_id in cust_ids)
+        async with self._lock:
+            if self._index is None:
+                self._index = await self.hass.async_add_executor_job(self._scan)
+            summary = None
+            if subsession_id in self._index:
+                summary = await self.hass.async_add_executor_job(
+                    self._read, subsession_id
+                )
+                self._index.move_to_end(subsession_id)
+            if summary is not None and cust_ids.issubset(summary["searched"]):
+                return summary
+
+            # new subsession, or a driver monitored since it was cached
+            if summary is not None:
+                cust_ids |= frozenset(summary["searched"])
+            # with several prefixes the document is decoded whole, in the executor
+            selected = await self.api.get_result(
+                subsession_id,
+                paths={
+                    STRENGTH_OF_FIELD: None,
+                    SPLITS: None,
+                    CLASSES: None,
+                    # the main event, practice and qualifying are numbered below 0
+                    RACE: {"simsession_number": 0},
+                },
+            )
+            summary = summarize(subsession_id, selected, cust_ids)
+            summary["searched"] = sorted(cust_ids)
+            self._index[subsession_id] = await self.hass.async_add_executor_job(
+                self._write, subsession_id, summary
+            )
+            self._index.move_to_end(subsession_id)
+            await self.hass.async_add_executor_job(self._evict, self._evicted())
+            return summary
+
+    def _file(self, subsession_id: int) -> str:
+        return os.path.join(self.path, f"{subsession_id}.json.gz")
+
+    def _evicted(self) -> list[int]:
+        evicted = []
+        size = self.size
+        while size > self.max_bytes and len(self._index) > 1:
+            subsession_id, file_size = self._index.popitem(last=False)
+            evicted.append(subsession_id)
+            size -= file_size
+        return evicted
+
+    def _scan(self) -> OrderedDict[int, int]:
+        """Index the cached files, least recently used first."""
+        if not os.path.isdir(self.path):
+            return OrderedDict()
+        files = []
+        for entry in os.scandir(self.path):
+            name = entry.name.removesuffix(".json.gz")
+            if name.isdigit():
+                stat = entry.stat()
+                files.append((stat.st_mtime, int(name), stat.st_size))
+        return OrderedDict(
+            (subsession_id, size) for _, subsession_id, size in sorted(files)
+        )
+
+    def _read(self, subsession_id: int) -> dict[str, Any] | None:
+        path = self._file(subsession_id)
+        try:
+            with gzip.open(path, "rb") as file:
+                summary = json_loads(file.read())
+            # the modification time orders the files for the next scan
+            os.utime(path)
+        except (OSError, ValueError) as err:
+            _LOGGER.debug("Unable to read the results of %s: %s", subsession_id, err)
+            return None
+        return summary
+
+    def _write(self, subsession_id: int, summary: dict[str, Any]) -> int:
+        os.makedirs(self.path, exist_ok=True)
+        data = gzip.compress(json_bytes(summary))
+        with open(self._file(subsession_id), "wb") as file:
+            file.write(data)
+        return len(data)
+
+    def _evict(self, subsession_ids: list[int]) -> None:
+        for subsession_id in subsession_ids:
+            try:
+                os.remove(self._file(subsession_id))
+            except OSError:
+                pass
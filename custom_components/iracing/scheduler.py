@@ -0,0 +1,69 @@
+"""Refresh scheduling shared by the iRacing config entries."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import hashlib
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .iracingapi.ratelimit import PrioritySemaphore
+
+# refreshes allowed to query the API at the same time, all entries together
+MAX_CONCURRENT_REFRESHES = 4
+# window over which the entries restored at startup start their refresh
+STARTUP_SPREAD = timedelta(seconds=60)
+# a slot closer than this share of the interval is skipped for the next one
+MIN_GAP = 0.1
+
+
+class RefreshScheduler:
+    """Spread the refreshes of all the entries over their interval.
+
+    Each entry gets a fixed phase derived from its id: its refreshes are
+    aligned on the slots ``phase * interval + k * interval``, so entries with
+    the same interval do not refresh together after a restart.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_REFRESHES) -> None:
+        """Initialize the scheduler."""
+        # a manual refresh goes before the queued background ones
+        self.semaphore = PrioritySemaphore(max_concurrent)
+
+    @staticmethod
+    def phase(key: str) -> float:
+        """Return the position of an entry in any interval, in [0, 1)."""
+        digest = hashlib.sha256(key.encode()).digest()
+        return int.from_bytes(digest[:8], "big") / 2**64
+
+    def next_delay(
+        self, key: str, interval: timedelta, now: datetime | None = None
+    ) -> timedelta:
+        """Return the delay until the next slot of an entry."""
+        seconds = interval.total_seconds()
+        if seconds <= 0:
+            return interval
+        now = now or dt_util.utcnow()
+        delay = seconds - (now.timestamp() - self.phase(key) * seconds) % seconds
+        if delay < seconds * MIN_GAP:
+            delay += seconds
+        return timedelta(seconds=delay)
+
+    @callback
+    def async_schedule_startup_refresh(
+        self, hass: HomeAssistant, coordinator: DataUpdateCoordinator
+    ) -> None:
+        """Refresh a coordinator at its offset in the startup window."""
+        entry = coordinator.config_entry
+
+        async def _async_refresh(_now: datetime) -> None:
+            await coordinator.async_refresh()
+
+        entry.async_on_unload(
+            async_call_later(
+                hass, STARTUP_SPREAD * self.phase(entry.entry_id), _async_refresh
+            )
+        )
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from typing import Any
 
@@ -16,25 +16,38 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, PERCENTAGE, EntityCategory
+from homeassistant.const import (
+    CONF_HOST,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .coordinator import IracingDataUpdateCoordinator
+from .coordinator import IracingDataUpdateCoordinator, IracingRosterCoordinator
 from .const import DOMAIN, DATA_CONFIG_ENTRY
+from .iracingapi import PRIORITY_INTERACTIVE, request_priority
+from .iracingapi.metrics import ClientMetrics
+from .models import CATEGORIES, METRICS, DriverSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
+# refresh of the API sensors, read from the client's in-memory counters
+SCAN_INTERVAL = timedelta(minutes=1)
+
 
 @dataclass
 class IracingSensorRequiredKeysMixin:
     """Class for Brother entity required keys."""
 
-    value: Callable[[any], StateType | datetime]
+    value: Callable[[DriverSnapshot], StateType | datetime]
 
 
 @dataclass
@@ -43,7 +56,94 @@ class IracingSensorEntityDescription(
 ):
     """A class that describes sensor entities."""
 
-    attr_fn: Callable[[dict[str, Any]], dict[str, Any]] = lambda _: {}
+    attr_fn: Callable[[DriverSnapshot], dict[str, Any]] = lambda _: {}
+    # coordinator keys the sensor is built from, defaults to its own key
+    data_keys: tuple[str, ...] | None = None
+    # created without a value, for data a driver may not have yet
+    always_create: bool = False
+
+
+@dataclass
+class IracingApiSensorRequiredKeysMixin:
+    """Class for iRacing API entity required keys."""
+
+    value: Callable[[ClientMetrics], StateType]
+
+
+@dataclass
+class IracingApiSensorEntityDescription(
+    SensorEntityDescription, IracingApiSensorRequiredKeysMixin
+):
+    """A class that describes the API client sensor entities."""
+
+    attr_fn: Callable[[ClientMetrics], dict[str, Any]] = lambda _: {}
+
+
+# metric key: (icon, state class), shared by every category
+METRIC_TYPES: dict[str, tuple[str, SensorStateClass]] = {
+    "licence_ir": ("mdi:trophy-variant", SensorStateClass.MEASUREMENT),
+    "licence_sr": ("mdi:map-marker-alert", SensorStateClass.MEASUREMENT),
+    "starts": ("mdi:flag-checkered", SensorStateClass.TOTAL_INCREASING),
+    "laps": ("mdi:counter", SensorStateClass.TOTAL_INCREASING),
+    "wins": ("mdi:trophy-outline", SensorStateClass.TOTAL_INCREASING),
+    "top5": ("mdi:medal-outline", SensorStateClass.TOTAL_INCREASING),
+}
+
+
+def _category_sensor(
+    category_id: int, prefix: str, metric: str
+) -> IracingSensorEntityDescription:
+    icon, state_class = METRIC_TYPES[metric]
+    attribute = METRICS[metric]
+    return IracingSensorEntityDescription(
+        key=f"{prefix}_{metric}",
+        icon=icon,
+        translation_key=f"{prefix}_{metric}",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value=lambda data: data.value(category_id, attribute),
+        state_class=state_class,
+    )
+
+
+# sensor key: (latest_race field, icon), the other fields are attributes
+LATEST_RACE_TYPES: dict[str, tuple[str, str]] = {
+    "latest_race_sof": ("strength_of_field", "mdi:account-group-outline"),
+    "latest_race_field_size": ("field_size", "mdi:car-multiple"),
+    "latest_race_class_position": ("class_position", "mdi:podium"),
+    "latest_race_incidents": ("incidents", "mdi:car-emergency"),
+    "latest_race_irating_change": ("irating_change", "mdi:chart-line-variant"),
+}
+
+# sensor key: (latest_laps field, icon, unit), the other fields are attributes
+LATEST_LAPS_TYPES: dict[str, tuple[str, str, str]] = {
+    "latest_race_best_lap": ("best_lap", "mdi:timer-star-outline", UnitOfTime.SECONDS),
+    "latest_race_median_lap": ("median_lap", "mdi:timer-outline", UnitOfTime.SECONDS),
+    "latest_race_lap_time_std": ("lap_time_std", "mdi:sigma", UnitOfTime.SECONDS),
+    "latest_race_clean_lap_ratio": (
+        "clean_lap_ratio",
+        "mdi:check-decagram-outline",
+        PERCENTAGE,
+    ),
+}
+
+
+def _latest_race_sensor(
+    key: str, slot: str, field: str, icon: str, **kwargs: Any
+) -> IracingSensorEntityDescription:
+    return IracingSensorEntityDescription(
+        key=key,
+        icon=icon,
+        translation_key=key,
+        value=lambda data: (getattr(data, slot) or {}).get(field),
+        attr_fn=lambda data: {
+            name: value
+            for name, value in (getattr(data, slot) or {}).items()
+            if name != field
+        },
+        data_keys=(slot,),
+        always_create=True,
+        **kwargs,
+    )
 
 
 SENSOR_TYPES: tuple[IracingSensorEntityDescription, ...] = (
@@ -52,253 +152,145 @@ SENSOR_TYPES: tuple[IracingSensorEntityDescription, ...] = (
         icon="mdi:card-account-details-outline",
         translation_key="driver",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["name"],
-        attr_fn=lambda data: data["recent_results"],
-    ),
-    ### SPORTS CAR
-    IracingSensorEntityDescription(
-        key="sports_car_licence_ir",
-        icon="mdi:trophy-variant",
-        translation_key="sports_car_licence_ir",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_licence_ir"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="sports_car_licence_sr",
-        icon="mdi:map-marker-alert",
-        translation_key="sports_car_licence_sr",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_licence_sr"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="sports_car_starts",
-        icon="mdi:flag-checkered",
-        translation_key="sports_car_starts",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_starts"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="sports_car_laps",
-        icon="mdi:counter",
-        translation_key="sports_car_laps",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_laps"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="sports_car_wins",
-        icon="mdi:trophy-outline",
-        translation_key="sports_car_wins",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_wins"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="sports_car_top5",
-        icon="mdi:medal-outline",
-        translation_key="sports_car_top5",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["sports_car_top5"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda data: data.name,
+        attr_fn=lambda data: {"recent_results": data.recent_results},
+        data_keys=("name", "recent_results"),
     ),
-    ### FORMULA CAR
     IracingSensorEntityDescription(
-        key="formula_car_licence_ir",
-        icon="mdi:trophy-variant",
-        translation_key="formula_car_licence_ir",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_licence_ir"],
-        state_class=SensorStateClass.MEASUREMENT,
+        key="next_race",
+        icon="mdi:calendar-clock",
+        translation_key="next_race",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value=lambda data: (
+            dt_util.parse_datetime(data.next_race["start"]) if data.next_race else None
+        ),
+        attr_fn=lambda data: {
+            key: value
+            for key, value in (data.next_race or {}).items()
+            if key != "start"
+        },
+        always_create=True,
     ),
     IracingSensorEntityDescription(
-        key="formula_car_licence_sr",
-        icon="mdi:map-marker-alert",
-        translation_key="formula_car_licence_sr",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_licence_sr"],
-        state_class=SensorStateClass.MEASUREMENT,
+        key="current_track",
+        icon="mdi:road-variant",
+        translation_key="current_track",
+        value=lambda data: data.current_week["track"] if data.current_week else None,
+        attr_fn=lambda data: {
+            key: value
+            for key, value in (data.current_week or {}).items()
+            if key != "track"
+        },
+        data_keys=("current_week",),
+        always_create=True,
     ),
-    IracingSensorEntityDescription(
-        key="formula_car_starts",
-        icon="mdi:flag-checkered",
-        translation_key="formula_car_starts",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_starts"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
+    *(
+        _latest_race_sensor(key, "latest_race", field, icon)
+        for key, (field, icon) in LATEST_RACE_TYPES.items()
     ),
-    IracingSensorEntityDescription(
-        key="formula_car_laps",
-        icon="mdi:counter",
-        translation_key="formula_car_laps",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_laps"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
+    *(
+        _latest_race_sensor(
+            key,
+            "latest_laps",
+            field,
+            icon,
+            device_class=(
+                SensorDeviceClass.DURATION if unit == UnitOfTime.SECONDS else None
+            ),
+            native_unit_of_measurement=unit,
+            state_class=SensorStateClass.MEASUREMENT,
+        )
+        for key, (field, icon, unit) in LATEST_LAPS_TYPES.items()
     ),
-    IracingSensorEntityDescription(
-        key="formula_car_wins",
-        icon="mdi:trophy-outline",
-        translation_key="formula_car_wins",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_wins"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
+    *(
+        _category_sensor(category_id, prefix, metric)
+        for category_id, prefix in CATEGORIES.items()
+        for metric in METRICS
     ),
-    IracingSensorEntityDescription(
-        key="formula_car_top5",
-        icon="mdi:medal-outline",
-        translation_key="formula_car_top5",
+)
+
+
+# sensors of a roster member, licences only: the roster polls member/get
+ROSTER_SENSOR_TYPES: tuple[IracingSensorEntityDescription, ...] = tuple(
+    description
+    for description in SENSOR_TYPES
+    if description.key == "driver"
+    or description.key.endswith(("_licence_ir", "_licence_sr"))
+)
+
+API_SENSOR_TYPES: tuple[IracingApiSensorEntityDescription, ...] = (
+    IracingApiSensorEntityDescription(
+        key="api_requests",
+        icon="mdi:swap-horizontal",
+        translation_key="api_requests",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["formula_car_top5"],
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda metrics: metrics.requests,
+        attr_fn=lambda metrics: {
+            "endpoints": {
+                endpoint: m.requests for endpoint, m in metrics.endpoints.items()
+            }
+        },
     ),
-    ### DIRT ROAD
-    IracingSensorEntityDescription(
-        key="dirt_road_licence_ir",
-        icon="mdi:trophy-variant",
-        translation_key="dirt_road_licence_ir",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_licence_ir"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_road_licence_sr",
-        icon="mdi:map-marker-alert",
-        translation_key="dirt_road_licence_sr",
+    IracingApiSensorEntityDescription(
+        key="api_latency",
+        icon="mdi:timer-outline",
+        translation_key="api_latency",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_licence_sr"],
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
         state_class=SensorStateClass.MEASUREMENT,
+        value=lambda metrics: metrics.latency_avg_ms,
+        attr_fn=lambda metrics: {
+            "endpoints": {
+                endpoint: m.as_dict()["latency_avg_ms"]
+                for endpoint, m in metrics.endpoints.items()
+            },
+            "links": {
+                endpoint: m.as_dict()["link_latency_avg_ms"]
+                for endpoint, m in metrics.endpoints.items()
+                if m.link_requests
+            },
+        },
     ),
-    IracingSensorEntityDescription(
-        key="dirt_road_starts",
-        icon="mdi:flag-checkered",
-        translation_key="dirt_road_starts",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_starts"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_road_laps",
-        icon="mdi:counter",
-        translation_key="dirt_road_laps",
+    IracingApiSensorEntityDescription(
+        key="api_bytes",
+        icon="mdi:download-network-outline",
+        translation_key="api_bytes",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_laps"],
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda metrics: metrics.bytes,
     ),
-    IracingSensorEntityDescription(
-        key="dirt_road_wins",
-        icon="mdi:trophy-outline",
-        translation_key="dirt_road_wins",
+    IracingApiSensorEntityDescription(
+        key="api_reauths",
+        icon="mdi:account-key-outline",
+        translation_key="api_reauths",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_wins"],
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda metrics: metrics.reauths,
     ),
-    IracingSensorEntityDescription(
-        key="dirt_road_top5",
-        icon="mdi:medal-outline",
-        translation_key="dirt_road_top5",
+    IracingApiSensorEntityDescription(
+        key="api_rate_limited",
+        icon="mdi:speedometer-slow",
+        translation_key="api_rate_limited",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_road_top5"],
         state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda metrics: metrics.rate_limited,
     ),
-    ### OVAL
-    IracingSensorEntityDescription(
-        key="oval_licence_ir",
-        icon="mdi:trophy-variant",
-        translation_key="oval_licence_ir",
+    IracingApiSensorEntityDescription(
+        key="api_ratelimit_remaining",
+        icon="mdi:gauge",
+        translation_key="api_ratelimit_remaining",
         entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_licence_ir"],
         state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="oval_licence_sr",
-        icon="mdi:map-marker-alert",
-        translation_key="oval_licence_sr",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_licence_sr"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="oval_starts",
-        icon="mdi:flag-checkered",
-        translation_key="oval_starts",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_starts"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="oval_laps",
-        icon="mdi:counter",
-        translation_key="oval_laps",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_laps"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="oval_wins",
-        icon="mdi:trophy-outline",
-        translation_key="oval_wins",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_wins"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="oval_top5",
-        icon="mdi:medal-outline",
-        translation_key="oval_top5",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["oval_top5"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    ### DIRT OVAL
-    IracingSensorEntityDescription(
-        key="dirt_oval_licence_ir",
-        icon="mdi:trophy-variant",
-        translation_key="dirt_oval_licence_ir",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_licence_ir"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_oval_licence_sr",
-        icon="mdi:map-marker-alert",
-        translation_key="dirt_oval_licence_sr",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_licence_sr"],
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_oval_starts",
-        icon="mdi:flag-checkered",
-        translation_key="dirt_oval_starts",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_starts"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_oval_laps",
-        icon="mdi:counter",
-        translation_key="dirt_oval_laps",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_laps"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_oval_wins",
-        icon="mdi:trophy-outline",
-        translation_key="dirt_oval_wins",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_wins"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
-    ),
-    IracingSensorEntityDescription(
-        key="dirt_oval_top5",
-        icon="mdi:medal-outline",
-        translation_key="dirt_oval_top5",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        value=lambda data: data["dirt_oval_top5"],
-        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda metrics: metrics.ratelimit_remaining,
+        attr_fn=lambda metrics: {
+            "limit": metrics.ratelimit_limit,
+            "reset": metrics.ratelimit_reset
+            and dt_util.utc_from_timestamp(metrics.ratelimit_reset).isoformat(),
+        },
     ),
 )
 
@@ -309,27 +301,116 @@ async def async_setup_entry(
     """Add iRacing entities from a config_entry."""
     coordinator = hass.data[DOMAIN][DATA_CONFIG_ENTRY][entry.entry_id]
 
-    await coordinator.async_config_entry_first_refresh()
+    if isinstance(coordinator, IracingRosterCoordinator):
+        _async_setup_roster(hass, entry, coordinator, async_add_entities)
+        return
+
+    if await coordinator.async_restore():
+        # entities come up from the stored snapshot, live data follows
+        coordinator.scheduler.async_schedule_startup_refresh(hass, coordinator)
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     sensors = []
     device_info = DeviceInfo(
-        identifiers={(DOMAIN, coordinator.data["cust_id"])},
+        identifiers={(DOMAIN, coordinator.data.cust_id)},
         entry_type=DeviceEntryType.SERVICE,
         manufacturer="iRacing.com",
-        model=coordinator.data["name"],
-        name=coordinator.data["name"],
+        model=coordinator.data.name,
+        name=coordinator.data.name,
     )
 
     for description in SENSOR_TYPES:
-        if description.value(coordinator.data) is not None:
+        if description.always_create or description.value(coordinator.data) is not None:
             sensors.append(IracingSensor(coordinator, description, device_info))
     async_add_entities(sensors, False)
 
+    if "username" in entry.data:
+        # the entry holding the credentials also owns the shared API client
+        api_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry.entry_id}_api")},
+            entry_type=DeviceEntryType.SERVICE,
+            manufacturer="iRacing.com",
+            name="iRacing API",
+        )
+        metrics = hass.data[DOMAIN][DATA_CONFIG_ENTRY]["api"].metrics
+        async_add_entities(
+            (
+                IracingApiSensor(metrics, description, entry, api_device_info)
+                for description in API_SENSOR_TYPES
+            ),
+            True,
+        )
+
+
+@callback
+def _async_setup_roster(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: IracingRosterCoordinator,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add the roster sensor, then member sensors as the members show up."""
+    async_add_entities([IracingRosterSensor(coordinator)])
+
+    # members with entities from a previous run get them back on first data
+    prefix = f"{entry.entry_id}_"
+    restored = {
+        entity.unique_id[len(prefix) :].split("_", 1)[0]
+        for entity in er.async_entries_for_config_entry(
+            er.async_get(hass), entry.entry_id
+        )
+        if entity.unique_id.startswith(prefix)
+    }
+    # drivers with an entry of their own already have their sensors
+    monitored = {
+        str(other.config_entry.data["cust_id"])
+        for other in hass.data[DOMAIN][DATA_CONFIG_ENTRY].values()
+        if isinstance(other, IracingDataUpdateCoordinator)
+    }
+    created: set[str] = set()
+    seen: set[str] = set()
+
+    @callback
+    def _async_add_members() -> None:
+        sensors = []
+        for cust_id in coordinator.changed_members:
+            # the other members only get sensors once their values move
+            if cust_id not in created | monitored and (
+                cust_id in coordinator.followed
+                or cust_id in restored
+                or cust_id in seen
+            ):
+                created.add(cust_id)
+                snapshot = coordinator.data[cust_id]
+                device_info = DeviceInfo(
+                    identifiers={(DOMAIN, cust_id)},
+                    entry_type=DeviceEntryType.SERVICE,
+                    manufacturer="iRacing.com",
+                    model=snapshot.name,
+                    name=snapshot.name,
+                )
+                sensors.extend(
+                    IracingRosterMemberSensor(
+                        coordinator, description, cust_id, device_info
+                    )
+                    for description in ROSTER_SENSOR_TYPES
+                    if description.value(snapshot) is not None
+                )
+            seen.add(cust_id)
+        if sensors:
+            async_add_entities(sensors)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_members))
+    coordinator.scheduler.async_schedule_startup_refresh(hass, coordinator)
+
 
 class IracingSensor(CoordinatorEntity[IracingDataUpdateCoordinator], SensorEntity):
     """Define an iRacing sensor."""
 
     _attr_has_entity_name = True
+    # the results are served by the get_recent_results service for history
+    _unrecorded_attributes = frozenset({"recent_results"})
     entity_description: IracingSensorEntityDescription
 
     def __init__(
@@ -342,17 +423,137 @@ class IracingSensor(CoordinatorEntity[IracingDataUpdateCoordinator], SensorEntit
         super().__init__(coordinator)
         self._attr_device_info = device_info
         self._attr_native_value = description.value(coordinator.data)
-        self._attr_unique_id = f"{coordinator.data['cust_id']}_{description.key}"
+        self._attr_unique_id = f"{coordinator.data.cust_id}_{description.key}"
         self.entity_description = description
+        self._data_keys = set(description.data_keys or (description.key,))
+        self._last_available: bool | None = None
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        if self.available == self._last_available and self._data_keys.isdisjoint(
+            self.coordinator.changed_keys
+        ):
+            return
+        self._last_available = self.available
         self._attr_native_value = self.entity_description.value(self.coordinator.data)
         self.async_write_ha_state()
 
+    async def async_update(self) -> None:
+        """Handle a manual refresh, served ahead of the background polling."""
+        with request_priority(PRIORITY_INTERACTIVE):
+            await super().async_update()
+
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         # _LOGGER.info(self.coordinator.data)
         return self.entity_description.attr_fn(self.coordinator.data)
+
+
+class IracingApiSensor(SensorEntity):
+    """Define a sensor of the shared iRacing API client."""
+
+    _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({"endpoints", "links"})
+    entity_description: IracingApiSensorEntityDescription
+
+    def __init__(
+        self,
+        metrics: ClientMetrics,
+        description: IracingApiSensorEntityDescription,
+        entry: ConfigEntry,
+        device_info: DeviceInfo,
+    ) -> None:
+        """Initialize."""
+        self._metrics = metrics
+        self._attr_device_info = device_info
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self.entity_description = description
+
+    async def async_update(self) -> None:
+        """Read the client counters."""
+        self._attr_native_value = self.entity_description.value(self._metrics)
+        self._attr_extra_state_attributes = self.entity_description.attr_fn(
+            self._metrics
+        )
+
+
+class IracingRosterSensor(CoordinatorEntity[IracingRosterCoordinator], SensorEntity):
+    """Define the member count sensor of a roster."""
+
+    _attr_has_entity_name = True
+    _attr_icon = "mdi:account-group"
+    _attr_translation_key = "roster"
+
+    def __init__(self, coordinator: IracingRosterCoordinator) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        entry = coordinator.config_entry
+        self._attr_unique_id = f"{entry.entry_id}_roster"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry.entry_id}_roster")},
+            entry_type=DeviceEntryType.SERVICE,
+            manufacturer="iRacing.com",
+            name=entry.title,
+        )
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of members."""
+        return len(self.coordinator.roster)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return {
+            "shards": len(self.coordinator.shards),
+            "tracked": len(self.coordinator.data or {}),
+        }
+
+
+class IracingRosterMemberSensor(
+    CoordinatorEntity[IracingRosterCoordinator], SensorEntity
+):
+    """Define a sensor of a roster member."""
+
+    _attr_has_entity_name = True
+    entity_description: IracingSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: IracingRosterCoordinator,
+        description: IracingSensorEntityDescription,
+        cust_id: str,
+        device_info: DeviceInfo,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        self.cust_id = cust_id
+        self._attr_device_info = device_info
+        self._attr_native_value = description.value(coordinator.data[cust_id])
+        self._attr_unique_id = (
+            f"{coordinator.config_entry.entry_id}_{cust_id}_{description.key}"
+        )
+        self.entity_description = description
+        self._last_available: bool | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return if the member is still in the roster."""
+        return super().available and self.cust_id in self.coordinator.data
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if (
+            self.available == self._last_available
+            and self.cust_id not in self.coordinator.changed_members
+        ):
+            return
+        self._last_available = self.available
+        if self.available:
+            self._attr_native_value = self.entity_description.value(
+                self.coordinator.data[self.cust_id]
+            )
+        self.async_write_ha_state()
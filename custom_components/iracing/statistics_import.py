@@ -0,0 +1,198 @@
+"""Import of the rating history into long-term statistics for iRacing."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, time, timedelta
+import logging
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    statistics_during_period,
+)
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_KEY_STATISTICS, STORAGE_VERSION
+from .models import CATEGORIES
+
+_LOGGER = logging.getLogger(__name__)
+
+# sensor metric key: member/chart_data chart type
+CHART_TYPES: dict[str, int] = {"licence_ir": 1, "licence_sr": 3}
+
+# delay before the imported days are written to disk
+SAVE_DELAY = 30
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_util.UTC)
+
+
+def statistics_store(hass: HomeAssistant, cust_id) -> Store:
+    """Return the store holding the days up to which the charts were imported."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_STATISTICS}.{cust_id}")
+
+
+def chart_value(metric: str, value: int) -> float:
+    """Return a chart point in the unit of the sensor."""
+    if metric == "licence_sr":
+        # licence class in the thousands, safety rating in hundredths
+        return (value % 1000) / 100
+    return value
+
+
+def _metadata(entity_id: str) -> StatisticMetaData:
+    metadata: dict[str, Any] = {
+        "has_mean": True,
+        "has_sum": False,
+        "name": None,
+        "source": "recorder",
+        "statistic_id": entity_id,
+        "unit_of_measurement": None,
+    }
+    # keys added by later Home Assistant versions
+    if "mean_type" in StatisticMetaData.__annotations__:
+        from homeassistant.components.recorder.models import StatisticMeanType
+
+        metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+    if "unit_class" in StatisticMetaData.__annotations__:
+        metadata["unit_class"] = None
+    return metadata
+
+
+class RatingStatistics:
+    """Copy the iRating and safety rating charts of a driver to the recorder.
+
+    Only the days before the first statistic the recorder compiled for a
+    sensor are imported, once: from then on the recorder has the real
+    values, at the hour they changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, api, cust_id) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.api = api
+        self.cust_id = cust_id
+        self._store = statistics_store(hass, cust_id)
+        # sensor key: first day left to the recorder
+        self._until: dict[str, str] | None = None
+        self.backfilled = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._until is not None
+
+    async def async_load(self) -> None:
+        """Load the days up to which the charts were imported."""
+        stored = await self._store.async_load() or {}
+        # "last" holds the charts imported by earlier versions
+        self._until = stored.get("until", stored.get("last", {}))
+
+    def async_schedule_import(self, entry) -> None:
+        """Import the charts in the background, once at a time."""
+        if "recorder" not in self.hass.config.components:
+            return
+        if self._task is None or self._task.done():
+            self._task = entry.async_create_background_task(
+                self.hass, self.async_import(), f"{DOMAIN} {self.cust_id} statistics"
+            )
+
+    async def async_import(self) -> None:
+        """Fetch the charts not imported yet and import their older points."""
+        if self._until is None:
+            await self.async_load()
+        registry = er.async_get(self.hass)
+        charts = [
+            (key, metric, entity_id, category_id, chart_type)
+            for category_id, prefix in CATEGORIES.items()
+            for metric, chart_type in CHART_TYPES.items()
+            if (key := f"{prefix}_{metric}")
+            and (
+                entity_id := registry.async_get_entity_id(
+                    SENSOR_DOMAIN, DOMAIN, f"{self.cust_id}_{key}"
+                )
+            )
+        ]
+        if not charts:
+            # the sensors are not created yet
+            return
+        charts = [chart for chart in charts if chart[0] not in self._until]
+
+        responses = await asyncio.gather(
+            *(
+                self.api.get_member_chart_data(self.cust_id, category_id, chart_type)
+                for _, _, _, category_id, chart_type in charts
+            ),
+            return_exceptions=True,
+        )
+        for (key, metric, entity_id, _, _), response in zip(charts, responses):
+            if isinstance(response, Exception):
+                _LOGGER.debug("Unable to get the %s chart: %s", key, response)
+                continue
+            until = (
+                await get_instance(self.hass).async_add_executor_job(
+                    _first_compiled_day, self.hass, entity_id
+                )
+            ).isoformat()
+            # one point per day, the latest wins
+            points = {
+                point["when"][:10]: chart_value(metric, point["value"])
+                for point in response.get("data") or []
+                if point["when"][:10] < until
+            }
+            if points:
+                async_import_statistics(
+                    self.hass,
+                    _metadata(entity_id),
+                    [
+                        StatisticData(
+                            start=_day_start(when), mean=value, min=value, max=value
+                        )
+                        for when, value in sorted(points.items())
+                    ],
+                )
+            self._until[key] = until
+            _LOGGER.debug("Imported %s points of %s", len(points), entity_id)
+
+        self.backfilled = all(key in self._until for key, *_ in charts)
+        self._store.async_delay_save(lambda: {"until": self._until}, SAVE_DELAY)
+
+
+def _first_compiled_day(hass: HomeAssistant, statistic_id: str) -> date:
+    """Return the day of the first statistic of a sensor, today without any."""
+    today = dt_util.utcnow().date()
+    months = statistics_during_period(
+        hass, EPOCH, None, {statistic_id}, "month", None, {"mean"}
+    ).get(statistic_id)
+    if not months:
+        return today
+    # monthly rows start on local months, the first hourly row is in 32 days
+    start = _row_start(months[0])
+    hours = statistics_during_period(
+        hass, start, start + timedelta(days=32), {statistic_id}, "hour", None, {"mean"}
+    ).get(statistic_id)
+    if not hours:
+        return today
+    return min(_row_start(hours[0]).date(), today)
+
+
+def _row_start(row) -> datetime:
+    # a timestamp since Home Assistant 2023.3, a datetime before
+    start = row["start"]
+    if isinstance(start, datetime):
+        return start
+    return dt_util.utc_from_timestamp(start)
+
+
+def _day_start(when: str) -> datetime:
+    # statistics start on the hour, local midnight may not be on one
+    return datetime.combine(date.fromisoformat(when), time(), tzinfo=dt_util.UTC)
@@ -0,0 +1,81 @@
+"""Fixtures of the iracingapi tests, run without Home Assistant."""
+
+import json
+import os
+import sys
+
+import pytest
+from yarl import URL
+
+# the client package is imported on its own, like in the benchmarks
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "iracing")
+)
+
+from iracingapi import irDataClient  # noqa: E402
+from iracingapi.retry import RetryPolicy  # noqa: E402
+from iracingapi.transport import RecordedResponse  # noqa: E402
+
+
+class _Exchange:
+    def __init__(self, response):
+        self._response = response
+
+    async def __aenter__(self):
+        if isinstance(self._response, BaseException):
+            raise self._response
+        return self._response
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+class FakeSession:
+    """Session answering each path with queued responses, the last one repeated.
+
+    A response is a ``(status, body)`` or ``(status, body, headers)`` tuple,
+    the body bytes or a JSON value, or an exception raised by the request.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = {path: list(answers) for path, answers in (routes or {}).items()}
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        return self._answer(url)
+
+    def post(self, url, **kwargs):
+        return self._answer(url)
+
+    async def close(self):
+        pass
+
+    def _answer(self, url):
+        path = URL(url).path
+        self.calls.append(path)
+        answers = self.routes[path]
+        answer = answers.pop(0) if len(answers) > 1 else answers[0]
+        if isinstance(answer, BaseException):
+            return _Exchange(answer)
+        status, body, *headers = answer
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        return _Exchange(RecordedResponse(status, headers[0] if headers else {}, body))
+
+
+AUTH_OK = (200, {"authcode": "code"})
+
+
+@pytest.fixture
+def session():
+    return FakeSession({"/auth": [AUTH_OK]})
+
+
+@pytest.fixture
+def client(session):
+    return irDataClient(
+        "driver@example.com",
+        "password",
+        session=session,
+        retry=RetryPolicy(max_attempts=3, base_delay=0),
+    )
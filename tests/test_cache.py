@@ -0,0 +1,79 @@
+"""Tests of the response cache."""
+
+import asyncio
+
+import pytest
+
+from iracingapi.cache import ResponseCache
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def run():
+        cache = ResponseCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": calls}
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("key", 60, fetch) for _ in range(5))
+        )
+        assert results == [{"value": 1}] * 5
+        assert await cache.get_or_fetch("key", 60, fetch) == {"value": 1}
+        return calls, cache.misses, cache.hits
+
+    assert asyncio.run(run()) == (1, 1, 5)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def run():
+        cache = ResponseCache()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        first = asyncio.create_task(cache.get_or_fetch("key", 60, fetch))
+        second = asyncio.create_task(cache.get_or_fetch("key", 60, fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "value"
+        assert cache.get("key") == "value"
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_is_not_cached():
+    async def run():
+        cache = ResponseCache()
+
+        async def fail():
+            raise RuntimeError("Unhandled Non-200 response", 500)
+
+        async def fetch():
+            return "value"
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_fetch("key", 60, fail)
+        assert await cache.get_or_fetch("key", 60, fetch) == "value"
+
+    asyncio.run(run())
+
+
+def test_endpoint_without_ttl_is_never_cached():
+    async def run():
+        cache = ResponseCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return "value"
+
+        await cache.get_or_fetch("key", 0, fetch)
+        await cache.get_or_fetch("key", 0, fetch)
+        return len(calls), len(cache)
+
+    assert asyncio.run(run()) == (2, 0)
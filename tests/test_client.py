@@ -0,0 +1,99 @@
+"""Tests of the request paths of irDataClient against a fake transport."""
+
+import asyncio
+import time
+
+import pytest
+
+from iracingapi import IracingAuthError, IracingConnectionError
+from iracingapi.retry import CircuitBreaker
+
+from conftest import AUTH_OK
+
+MEMBERS = {"members": [{"cust_id": 1}]}
+
+
+def _reset_headers():
+    # a window already over, the limiter lets the retry through at once
+    return {
+        "x-ratelimit-limit": "100",
+        "x-ratelimit-remaining": "0",
+        "x-ratelimit-reset": str(int(time.time()) - 1),
+    }
+
+
+def test_server_errors_are_retried(client, session):
+    session.routes["/data/member/get"] = [(503, b""), (502, b""), (200, MEMBERS)]
+    assert asyncio.run(client.get_member(1)) == MEMBERS
+    assert session.calls.count("/data/member/get") == 3
+    assert client.metrics.retries == 2
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.failures == 0
+
+
+def test_connection_errors_give_up_after_the_last_attempt(client, session):
+    session.routes["/data/member/get"] = [asyncio.TimeoutError()]
+    with pytest.raises(IracingConnectionError):
+        asyncio.run(client.get_member(1))
+    assert session.calls.count("/data/member/get") == 3
+
+
+def test_expired_session_logs_in_again_once(client, session):
+    session.routes["/data/member/get"] = [(401, b""), (200, MEMBERS)]
+    assert asyncio.run(client.get_member(1)) == MEMBERS
+    assert session.calls == ["/auth", "/data/member/get", "/auth", "/data/member/get"]
+    assert client.metrics.reauths == 1
+
+
+def test_unauthorized_after_a_new_login_fails(client, session):
+    session.routes["/data/member/get"] = [(401, b"")]
+    with pytest.raises(IracingAuthError):
+        asyncio.run(client.get_member(1))
+    assert session.calls.count("/auth") == 2
+
+
+def test_rate_limited_request_is_sent_again(client, session):
+    session.routes["/data/member/get"] = [
+        (429, b"", _reset_headers()),
+        (200, MEMBERS),
+    ]
+    assert asyncio.run(client.get_member(1)) == MEMBERS
+    assert client.metrics.rate_limited == 1
+
+
+def test_rate_limited_too_often_fails(client, session):
+    session.routes["/data/member/get"] = [(429, b"", _reset_headers())]
+    with pytest.raises(IracingConnectionError):
+        asyncio.run(client.get_member(1))
+    assert session.calls.count("/data/member/get") == client.retry.max_rate_limited + 1
+
+
+def test_undecodable_probe_does_not_leave_the_breaker_half_open(client, session):
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    client.retry.max_attempts = 1
+    session.routes["/data/member/get"] = [(200, b"<html>Bad gateway</html>")]
+    with pytest.raises(IracingConnectionError):
+        asyncio.run(client.get_member(1))
+    assert client.breaker.state == CircuitBreaker.OPEN
+    session.routes["/data/member/get"] = [(200, MEMBERS)]
+    assert asyncio.run(client.get_member(1)) == MEMBERS
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_login_error_page_counts_as_a_failure(client, session):
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    session.routes["/auth"] = [(502, b"<html>Bad gateway</html>")]
+    with pytest.raises(IracingConnectionError):
+        asyncio.run(client.check_connection())
+    assert client.breaker.state == CircuitBreaker.OPEN
+    session.routes["/auth"] = [AUTH_OK]
+    asyncio.run(client.check_connection())
+    assert client.authenticated
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rejected_login_is_an_auth_error(client, session):
+    session.routes["/auth"] = [(200, {"authcode": 0, "message": "Invalid email"})]
+    with pytest.raises(IracingAuthError):
+        asyncio.run(client.check_connection())
+    assert client.breaker.state == CircuitBreaker.CLOSED
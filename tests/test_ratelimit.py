@@ -0,0 +1,92 @@
+"""Tests of the request priority queues."""
+
+import asyncio
+import time
+
+import pytest
+
+from iracingapi.ratelimit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PrioritySemaphore,
+    RateLimiter,
+    request_priority,
+)
+
+
+def test_priority_semaphore_serves_interactive_first():
+    async def run():
+        semaphore = PrioritySemaphore(1)
+        order = []
+
+        async def worker(name, priority):
+            with request_priority(priority):
+                async with semaphore:
+                    order.append(name)
+                    await asyncio.sleep(0)
+
+        await semaphore.acquire()
+        tasks = [
+            asyncio.create_task(worker(f"bg{i}", PRIORITY_BACKGROUND)) for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("manual", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["manual", "bg0", "bg1", "bg2"]
+
+
+def test_priority_semaphore_cancelled_waiter_gives_back_its_slot():
+    async def run():
+        semaphore = PrioritySemaphore(1)
+        await semaphore.acquire()
+        waiter = asyncio.create_task(semaphore.acquire())
+        await asyncio.sleep(0)
+        # the slot is handed to the waiter, then the waiter is cancelled
+        semaphore.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.wait_for(semaphore.acquire(), 0.1)
+
+    asyncio.run(run())
+
+
+def _headers(limit, remaining, reset):
+    return {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(reset),
+    }
+
+
+def test_ratelimiter_holds_requests_until_the_window_resets():
+    async def run():
+        limiter = RateLimiter()
+        reset = int(time.time()) + 3600
+        limiter.exhausted(_headers(100, 0, reset))
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        # the next window reported by a response lets it through
+        limiter.update(_headers(100, 100, reset + 3600))
+        await asyncio.wait_for(waiter, 0.1)
+
+    asyncio.run(run())
+
+
+def test_ratelimiter_paces_background_requests_only():
+    async def run():
+        limiter = RateLimiter()
+        limiter.update(_headers(100, 10, int(time.time()) + 3600))
+        await asyncio.wait_for(limiter.acquire(PRIORITY_BACKGROUND), 0.1)
+        background = asyncio.create_task(limiter.acquire(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0.05)
+        assert not background.done()
+        await asyncio.wait_for(limiter.acquire(PRIORITY_INTERACTIVE), 0.1)
+        background.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+"""Tests of the retry policy and the circuit breaker."""
+
+import pytest
+
+from iracingapi import retry
+from iracingapi.retry import CircuitBreaker, RetryPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry, "time", clock)
+    return clock
+
+
+def test_delay_is_capped_full_jitter():
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    for attempt in range(10):
+        assert 0 <= policy.delay(attempt) <= min(5, 2**attempt)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in == 30
+
+
+def test_breaker_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_doubles_the_reset_timeout(clock):
+    breaker = CircuitBreaker(
+        failure_threshold=1, reset_timeout=30, max_reset_timeout=50
+    )
+    breaker.failure()
+    for expected in (60, 50):
+        clock.now += breaker.reset_timeout
+        assert breaker.allow()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.reset_timeout == min(expected, 50)
+    clock.now += breaker.reset_timeout
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.reset_timeout == 30
+
+
+def test_abandoned_probe_lets_another_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()